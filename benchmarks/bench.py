@@ -0,0 +1,280 @@
+"""Throughput benchmarks for the Image2PDF conversion hot paths.
+
+Generates synthetic corpora offline (folders and CBZ archives of JPEG/PNG/WebP pages) and
+times optimize_image, process_images_to_pdf, process_folder, process_archive and the full
+batch path at several fixed Thread_Count values, plus once with Adaptive_Scheduling. Every case runs in a fresh interpreter so its
+peak RSS is measured on its own. Results are written as JSON.
+
+    python benchmarks/bench.py --out bench.json
+    python benchmarks/bench.py --quick --cases folder,archive
+"""
+import os
+import sys
+import io
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import zipfile
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from PIL import Image, ImageDraw
+
+CASES = ['optimize', 'encode', 'folder', 'archive', 'batch']
+FORMATS = {'jpeg': ('JPEG', '.jpg'), 'png': ('PNG', '.png'), 'webp': ('WEBP', '.webp')}
+
+# name: (width, height, pages, landscape ratio)
+CORPORA = {
+    'phone': (800, 1200, 60, 0.1),
+    'scan': (1654, 2339, 40, 0.1),
+    'spread': (2480, 3508, 20, 0.5),
+}
+QUICK_CORPORA = {
+    'phone': (400, 600, 12, 0.25),
+}
+
+# --- Corpus Generation ---
+def make_page(width, height, seed, landscape=False):
+    """A deterministic page with panels, line art and noisy tones, so codecs have real work to do."""
+    if landscape: width *= 2  # double-page spread
+    rng = random.Random(seed)
+    img = Image.new('RGB', (width, height), (250, 248, 240))
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        x0, y0 = rng.randrange(width // 2), rng.randrange(height // 2)
+        x1, y1 = x0 + rng.randrange(width // 4, width // 2), y0 + rng.randrange(height // 4, height // 2)
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle((x0, y0, x1, y1), fill=fill, outline=(0, 0, 0), width=max(1, width // 200))
+    for _ in range(40):
+        points = [(rng.randrange(width), rng.randrange(height)) for _ in range(2)]
+        draw.line(points, fill=(0, 0, 0), width=max(1, width // 400))
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    return Image.blend(img, noise, 0.12)
+
+def page_bytes(img, fmt):
+    buffer = io.BytesIO()
+    img.save(buffer, fmt, quality=90)
+    return buffer.getvalue()
+
+def generate_corpus(workdir, corpora, formats):
+    """Writes one folder and one CBZ per (corpus, format) pair; returns their descriptions."""
+    entries = []
+    for name, (width, height, pages, landscape_ratio) in corpora.items():
+        for fmt_name in formats:
+            fmt, ext = FORMATS[fmt_name]
+            label = f"{name}-{fmt_name}"
+            folder = os.path.join(workdir, 'folders', label)
+            os.makedirs(folder, exist_ok=True)
+            archive_path = os.path.join(workdir, 'archives', f"{label}.cbz")
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            rng = random.Random(name)
+            input_bytes = 0
+            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED) as zf:
+                for i in range(pages):
+                    img = make_page(width, height, seed=f"{name}-{i}", landscape=rng.random() < landscape_ratio)
+                    data = page_bytes(img, fmt)
+                    input_bytes += len(data)
+                    with open(os.path.join(folder, f"{i + 1:04d}{ext}"), 'wb') as f: f.write(data)
+                    zf.writestr(f"{i + 1:04d}{ext}", data)
+            entries.append({'label': label, 'folder': folder, 'archive': archive_path,
+                            'pages': pages, 'input_bytes': input_bytes})
+    return entries
+
+# --- Measurement ---
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB."""
+    try:
+        import resource
+    except ImportError:
+        return windows_peak_rss_mb()
+    scale = 1 if sys.platform == 'darwin' else 1024
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage * scale / (1024 * 1024)
+
+def windows_peak_rss_mb():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+    return counters.PeakWorkingSetSize / (1024 * 1024)
+
+def result(case, params, seconds, pages, input_bytes, output_bytes=0):
+    return {
+        'case': case,
+        'params': params,
+        'seconds': round(seconds, 4),
+        'pages': pages,
+        'pages_per_s': round(pages / seconds, 2) if seconds else None,
+        'mb_per_s': round(input_bytes / seconds / (1024 * 1024), 2) if seconds else None,
+        'output_bytes': output_bytes,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+def configure(main, threads=None):
+    main.SETTINGS.update({'Incremental': False, 'Output_Path': ''})
+    if threads is not None: main.SETTINGS['Thread_Count'] = threads
+
+# --- Cases (each runs in its own interpreter) ---
+def case_optimize(main, entry, mode):
+    files = sorted(os.listdir(entry['folder']))
+    images = []
+    for name in files:
+        with Image.open(os.path.join(entry['folder'], name)) as img:
+            img.load()
+            images.append(img.copy())
+    start = time.perf_counter()
+    pages = 0
+    for img in images:
+        for page in main.optimize_image(img, mode=mode):
+            pages += 1
+            page.close()
+    return result('optimize', {'corpus': entry['label'], 'mode': mode},
+                  time.perf_counter() - start, pages, entry['input_bytes'])
+
+def case_encode(main, entry, pdf_path):
+    files = sorted(os.listdir(entry['folder']))
+    images = []
+    for name in files:
+        with Image.open(os.path.join(entry['folder'], name)) as img:
+            images.extend(main.optimize_image(img))
+    start = time.perf_counter()
+    success = main.process_images_to_pdf(images, pdf_path, entry['label'])
+    seconds = time.perf_counter() - start
+    return result('encode', {'corpus': entry['label'], 'success': success}, seconds, len(images),
+                  entry['input_bytes'], os.path.getsize(pdf_path) if success else 0)
+
+def case_folder(main, entry, pdf_path, mode):
+    main.SETTINGS['Landscape_Mode'] = mode
+    start = time.perf_counter()
+    success = main.process_folder(entry['folder'], pdf_path)
+    seconds = time.perf_counter() - start
+    return result('folder', {'corpus': entry['label'], 'mode': mode, 'success': success}, seconds,
+                  entry['pages'], entry['input_bytes'], os.path.getsize(pdf_path) if success else 0)
+
+def case_archive(main, entry, pdf_path, mode):
+    main.SETTINGS['Landscape_Mode'] = mode
+    start = time.perf_counter()
+    success = main.process_archive(entry['archive'], pdf_path)
+    seconds = time.perf_counter() - start
+    return result('archive', {'corpus': entry['label'], 'mode': mode, 'success': success}, seconds,
+                  entry['pages'], entry['input_bytes'], os.path.getsize(pdf_path) if success else 0)
+
+def case_batch(main, entries, source_dir, threads, backend, adaptive):
+    configure(main, threads)
+    # The adaptive scheduler would change the concurrency the thread sweep is measuring
+    main.SETTINGS.update({'Parallel_Processing': True, 'Execution_Backend': backend,
+                          'Adaptive_Scheduling': adaptive})
+    label = 'adaptive' if adaptive else threads
+    out_dir = os.path.join(os.path.dirname(source_dir), f"out-batch-{backend}-{label}")
+    os.makedirs(out_dir, exist_ok=True)
+    main.SETTINGS['Output_Path'] = out_dir
+    start = time.perf_counter()
+    main.run_work_items(main.scan_sources(source_dir))
+    seconds = time.perf_counter() - start
+    output_bytes = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    return result('batch', {'threads': threads, 'backend': backend, 'adaptive': adaptive}, seconds,
+                  sum(e['pages'] for e in entries), sum(e['input_bytes'] for e in entries), output_bytes)
+
+def run_case(spec):
+    import main
+    configure(main)
+    case, workdir = spec['case'], spec['workdir']
+    entries = spec['entries']
+    pdf_path = os.path.join(workdir, 'out', f"{case}-{os.getpid()}.pdf")
+    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+    if case == 'batch':
+        return case_batch(main, entries, os.path.join(workdir, 'archives'), spec['threads'], spec['backend'],
+                          spec['adaptive'])
+    entry = spec['entry']
+    if case == 'optimize': return case_optimize(main, entry, spec['mode'])
+    if case == 'encode': return case_encode(main, entry, pdf_path)
+    if case == 'folder': return case_folder(main, entry, pdf_path, spec['mode'])
+    if case == 'archive': return case_archive(main, entry, pdf_path, spec['mode'])
+    raise ValueError(f"Unknown case {case}")
+
+def case_specs(cases, entries, workdir, threads, backends):
+    modes = ['none', 'split', 'rotate', 'letterbox']
+    for case in cases:
+        if case == 'batch':
+            for backend in backends:
+                for count in threads:
+                    yield {'case': case, 'workdir': workdir, 'entries': entries, 'threads': count,
+                           'backend': backend, 'adaptive': False}
+                # Starts at one item per core and follows free memory and CPU from there
+                yield {'case': case, 'workdir': workdir, 'entries': entries, 'threads': 0,
+                       'backend': backend, 'adaptive': True}
+            continue
+        for entry in entries:
+            for mode in (modes if case in ('optimize', 'folder', 'archive') else ['none']):
+                yield {'case': case, 'workdir': workdir, 'entries': entries, 'entry': entry, 'mode': mode}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Image2PDF conversion hot paths.")
+    parser.add_argument('--out', help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--quick', action='store_true', help="Small corpus for a fast smoke run")
+    parser.add_argument('--cases', default=','.join(CASES), help=f"Comma-separated subset of {CASES}")
+    parser.add_argument('--formats', default='jpeg,png,webp', help="Comma-separated page formats")
+    parser.add_argument('--threads', default='1,2,4,8', help="Thread_Count values for the batch case")
+    parser.add_argument('--backends', default='thread', help="Execution_Backend values for the batch case")
+    parser.add_argument('--workdir', help="Keep the corpus here instead of a temporary directory")
+    parser.add_argument('--case-spec', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case_spec:
+        with open(args.case_spec, 'r', encoding='utf-8') as f: spec = json.load(f)
+        print(json.dumps(run_case(spec)))
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='image2pdf-bench-')
+    try:
+        corpora = QUICK_CORPORA if args.quick else CORPORA
+        print(f"Generating corpus in {workdir}...", file=sys.stderr)
+        entries = generate_corpus(workdir, corpora, args.formats.split(','))
+        specs = case_specs(args.cases.split(','), entries, workdir,
+                           [int(t) for t in args.threads.split(',')], args.backends.split(','))
+        results = []
+        spec_path = os.path.join(workdir, 'spec.json')
+        for spec in specs:
+            with open(spec_path, 'w', encoding='utf-8') as f: json.dump(spec, f)
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--case-spec', spec_path],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                continue
+            record = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{record['case']:9} {json.dumps(record['params'])}: {record['pages_per_s']} pages/s, "
+                  f"{record['mb_per_s']} MB/s, {record['peak_rss_mb']} MB peak", file=sys.stderr)
+            results.append(record)
+
+        report = {
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'cpu_count': os.cpu_count(),
+            'corpora': corpora,
+            'results': results,
+        }
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as f: json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+    finally:
+        if not args.workdir: shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""Tkinter front end for Image2PDF. Imported on demand by main.py, so the CLI never loads it."""
+import os
+import importlib.util
+import logging
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox, scrolledtext
+import ctypes
+import webbrowser
+
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from ttkbootstrap.widgets import ToolTip
+
+import main as core
+from main import (SETTINGS, APP_DIR, LOG_FILE, STAGES, SUBSAMPLING, RunReport, save_config,
+                  scan_sources, run_work_items, check_unrar_status, notify)
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+# --- High DPI Fix ---
+try:
+    ctypes.windll.shcore.SetProcessDpiAwareness(1)
+except Exception:
+    pass
+
+def perform_startup_check(root):
+    status = check_unrar_status()
+    if status == "OK":
+        return
+
+    if status == "COPY":
+        msg = (
+            "UnRAR.exe Detected in Program Files!\n\n"
+            "To enable RAR/CBR support, please COPY 'UnRAR.exe' from:\n"
+            "C:\\Program Files\\WinRAR\\\n\n"
+            "And PASTE it into this application's folder:\n"
+            f"{APP_DIR}\n\n"
+            "Then restart the application."
+        )
+        messagebox.showinfo("Setup Required", msg, parent=root)
+    
+    elif status == "DOWNLOAD":
+        url = "https://www.win-rar.com/start.html?&L=0"
+        msg = (
+            "WinRAR Not Installed / UnRAR Missing!\n\n"
+            "To support RAR/CBR files, you need WinRAR.\n"
+            "Would you like to open the download page now?"
+        )
+        if messagebox.askyesno("Missing Component", msg, icon="warning", parent=root):
+            webbrowser.open(url)
+
+# --- GUI Class ---
+class ConverterGUI(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        
+        # Run Check
+        # Run Smart Check
+        self.after(500, lambda: perform_startup_check(self))
+
+        self.style = ttk.Style(theme=SETTINGS['Theme'])
+        self.title("Image2PDF Professional")
+        self.geometry("700x790")
+        
+        # Ensure icon support if we add one later
+        # try: self.iconbitmap(os.path.join(APP_DIR, 'icon.ico'))
+        # except: pass
+        
+        self.source_path = tk.StringVar()
+        self.output_path = tk.StringVar(value=SETTINGS['Output_Path'])
+        self.status_var = tk.StringVar(value="Ready")
+        self.stats_var = tk.StringVar(value="")
+        self.progress_var = tk.DoubleVar()
+        
+        self.parallel_var = tk.BooleanVar(value=SETTINGS['Parallel_Processing'])
+        self.quality_var = tk.IntVar(value=SETTINGS['PDF_Quality'])
+        self.threads_var = tk.IntVar(value=SETTINGS['Thread_Count'])
+        self.rar_var = tk.BooleanVar(value=SETTINGS['Enable_RAR'])
+        self.landscape_var = tk.StringVar(value=SETTINGS['Landscape_Mode'])
+        self.theme_var = tk.StringVar(value=SETTINGS['Theme'])
+        self.delete_var = tk.BooleanVar(value=SETTINGS['Delete_Source'])
+        self.backend_var = tk.StringVar(value=SETTINGS['Execution_Backend'])
+        self.max_dim_var = tk.IntVar(value=SETTINGS['Max_Dimension'])
+        self.target_var = tk.DoubleVar(value=SETTINGS['Target_Size_MB'])
+        self.subsampling_var = tk.StringVar(value=SETTINGS['Chroma_Subsampling'])
+        self.normalize_var = tk.BooleanVar(value=SETTINGS['Normalize_Page_Size'])
+        self.zero_copy_var = tk.BooleanVar(value=SETTINGS['Zero_Copy_Layout'])
+        self.crop_var = tk.BooleanVar(value=SETTINGS['Auto_Crop'])
+        self.blank_var = tk.BooleanVar(value=SETTINGS['Skip_Blank_Pages'])
+        self.spreads_var = tk.BooleanVar(value=SETTINGS['Detect_Spreads'])
+        
+        self.is_running = False
+        self.report = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self, padding=20)
+        main_frame.pack(fill=BOTH, expand=True)
+        
+        ttk.Label(main_frame, text="Image to PDF Converter", font=("Segoe UI", 18, "bold"), bootstyle="primary").pack(pady=(0, 20))
+        
+        # Source
+        src_frame = ttk.Labelframe(main_frame, text="Source Folder/Archive", padding=10, bootstyle="info")
+        src_frame.pack(fill=X, pady=5)
+        ttk.Entry(src_frame, textvariable=self.source_path).pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
+        btn_src = ttk.Button(src_frame, text="Browse", command=self.browse_source, bootstyle="secondary-outline")
+        btn_src.pack(side=LEFT)
+        ToolTip(btn_src, text="Select the folder containing images or subfolders/archives")
+
+        # Output
+        out_frame = ttk.Labelframe(main_frame, text="Output Folder (Optional)", padding=10, bootstyle="info")
+        out_frame.pack(fill=X, pady=5)
+        ttk.Entry(out_frame, textvariable=self.output_path).pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
+        btn_out = ttk.Button(out_frame, text="Browse", command=self.browse_output, bootstyle="secondary-outline")
+        btn_out.pack(side=LEFT)
+        ToolTip(btn_out, text="PDFs will be saved here. Leave empty to save in source folder.")
+        
+        # Config
+        opt_frame = ttk.Labelframe(main_frame, text="Configuration", padding=10, bootstyle="warning")
+        opt_frame.pack(fill=X, pady=10)
+        
+        # Row 1
+        r1 = ttk.Frame(opt_frame); r1.pack(fill=X, pady=5)
+        cb_par = ttk.Checkbutton(r1, text="Parallel Processing", variable=self.parallel_var, bootstyle="round-toggle", command=self.toggle_threads)
+        cb_par.pack(side=LEFT)
+        ToolTip(cb_par, text="Faster conversion using multiple CPU cores")
+        
+        ttk.Label(r1, text="Threads:").pack(side=LEFT, padx=(15, 5))
+        self.spin_threads = ttk.Spinbox(r1, from_=1, to=32, textvariable=self.threads_var, width=5)
+        self.spin_threads.pack(side=LEFT)
+        ToolTip(self.spin_threads, text="Files converted at once. With adaptive scheduling this is the starting point:\nfewer run when memory gets low, more while CPU cores sit idle.")
+
+        ttk.Label(r1, text="Engine:").pack(side=LEFT, padx=(15, 5))
+        self.cb_backend = ttk.Combobox(r1, textvariable=self.backend_var, values=['thread', 'process'], width=8, state="readonly")
+        self.cb_backend.pack(side=LEFT)
+        ToolTip(self.cb_backend, text="thread: Lightweight, shares memory\nprocess: One process per worker, scales across all CPU cores")
+        
+        ttk.Label(r1, text="Theme:").pack(side=LEFT, padx=(20, 5))
+        cb_theme = ttk.Combobox(r1, textvariable=self.theme_var, values=self.style.theme_names(), width=10, state="readonly")
+        cb_theme.pack(side=LEFT)
+        cb_theme.bind("<<ComboboxSelected>>", self.change_theme)
+
+        # Row 2
+        r2 = ttk.Frame(opt_frame); r2.pack(fill=X, pady=5)
+        ttk.Label(r2, text="Quality (1-100):").pack(side=LEFT, padx=(0, 5))
+        sp_qual = ttk.Spinbox(r2, from_=1, to=100, textvariable=self.quality_var, width=5)
+        sp_qual.pack(side=LEFT)
+        ToolTip(sp_qual, text="Set PDF Quality (1-100). 100 is Lossless.")
+        
+        ttk.Label(r2, text="Landscape Mode:").pack(side=LEFT, padx=(20, 5))
+        modes = ['none', 'letterbox', 'split', 'rotate']
+        cb_land = ttk.Combobox(r2, textvariable=self.landscape_var, values=modes, width=10, state="readonly")
+        cb_land.pack(side=LEFT)
+        ToolTip(cb_land, text="None: Keep Original\nLetterbox: Add White Bars\nSplit: Cut for Manga\nRotate: Turn 90 deg")
+        
+        cb_rar = ttk.Checkbutton(r2, text="RAR/CBR Support", variable=self.rar_var, bootstyle="square-toggle")
+        cb_rar.pack(side=LEFT, padx=(20, 0))
+        ToolTip(cb_rar, text="Enable support for .rar and .cbr files. Requires UnRAR.exe.")
+
+        # Row 2b (Size)
+        r2b = ttk.Frame(opt_frame); r2b.pack(fill=X, pady=5)
+        ttk.Label(r2b, text="Max Size (px):").pack(side=LEFT, padx=(0, 5))
+        sp_dim = ttk.Spinbox(r2b, from_=0, to=20000, increment=100, textvariable=self.max_dim_var, width=7)
+        sp_dim.pack(side=LEFT)
+        ToolTip(sp_dim, text="Downscale pages whose longest edge is larger than this. 0 = Keep original size.")
+
+        ttk.Label(r2b, text="Target Size (MB):").pack(side=LEFT, padx=(20, 5))
+        sp_target = ttk.Spinbox(r2b, from_=0, to=10000, increment=5, textvariable=self.target_var, width=7)
+        sp_target.pack(side=LEFT)
+        ToolTip(sp_target, text="Pick the JPEG quality per PDF so it fits this size. 0 = Use the Quality setting.")
+
+        ttk.Label(r2b, text="Chroma:").pack(side=LEFT, padx=(20, 5))
+        cb_sub = ttk.Combobox(r2b, textvariable=self.subsampling_var, values=['auto'] + list(SUBSAMPLING), width=6, state="readonly")
+        cb_sub.pack(side=LEFT)
+        ToolTip(cb_sub, text="Chroma subsampling. auto: 4:4:4 at Quality 100, otherwise 4:2:0 (smaller files).")
+
+        # Row 3 (Delete Safety)
+        r3 = ttk.Frame(opt_frame); r3.pack(fill=X, pady=(10, 5))
+        cb_del = ttk.Checkbutton(r3, text="Delete Source Files After Conversion", variable=self.delete_var, bootstyle="danger-round-toggle")
+        cb_del.pack(side=LEFT)
+        ToolTip(cb_del, text="WARNING: This deletes the original folder/archive after successful PDF creation.")
+
+        cb_norm = ttk.Checkbutton(r3, text="Uniform Page Size", variable=self.normalize_var, bootstyle="round-toggle")
+        cb_norm.pack(side=LEFT, padx=(20, 0))
+        ToolTip(cb_norm, text="Show every page of a PDF at the same height, whatever its resolution. Pixels are not changed.")
+
+        cb_zero = ttk.Checkbutton(r3, text="Zero-Copy Layout", variable=self.zero_copy_var, bootstyle="round-toggle")
+        cb_zero.pack(side=LEFT, padx=(20, 0))
+        ToolTip(cb_zero, text="Split, letterbox and rotate wide pages with PDF page geometry instead of cutting pixels.\nSplit spreads are stored once, so PDFs get smaller and conversion faster.")
+
+        # Row 4 (Page Analysis, needs NumPy)
+        r4 = ttk.Frame(opt_frame); r4.pack(fill=X, pady=5)
+        analysis_state = "normal" if importlib.util.find_spec('numpy') else "disabled"
+        cb_crop = ttk.Checkbutton(r4, text="Auto-Crop Margins", variable=self.crop_var, bootstyle="round-toggle", state=analysis_state)
+        cb_crop.pack(side=LEFT)
+        ToolTip(cb_crop, text="Trim blank or scanner-border margins around each page (needs NumPy).")
+
+        cb_blank = ttk.Checkbutton(r4, text="Skip Blank Pages", variable=self.blank_var, bootstyle="round-toggle", state=analysis_state)
+        cb_blank.pack(side=LEFT, padx=(20, 0))
+        ToolTip(cb_blank, text="Leave out pages with (almost) nothing on them (needs NumPy).")
+
+        cb_spreads = ttk.Checkbutton(r4, text="Detect Spreads", variable=self.spreads_var, bootstyle="round-toggle", state=analysis_state)
+        cb_spreads.pack(side=LEFT, padx=(20, 0))
+        ToolTip(cb_spreads, text="Split mode only cuts wide pages with a centre gutter; wide single images stay whole (needs NumPy).")
+
+        btn_box = ttk.Frame(opt_frame); btn_box.pack(fill=X, pady=(10,0))
+        btn_log = ttk.Button(btn_box, text="View Logs", command=self.view_logs, bootstyle="danger-link")
+        btn_log.pack(side=LEFT)
+        ToolTip(btn_log, text="Click to see error logs (e.g. broken zips, missing files).")
+        ttk.Button(btn_box, text="Save Settings", command=self.save_settings, bootstyle="success-outline").pack(side=RIGHT)
+
+        # Progress
+        self.pbar = ttk.Floodgauge(main_frame, variable=self.progress_var, maximum=100, bootstyle="success", mask="{}%")
+        self.pbar.pack(fill=X, pady=20)
+        self.lbl_status = ttk.Label(main_frame, textvariable=self.status_var, font=("Segoe UI", 9))
+        self.lbl_status.pack()
+        self.lbl_stats = ttk.Label(main_frame, textvariable=self.stats_var, font=("Consolas", 8), bootstyle="secondary", justify=CENTER)
+        self.lbl_stats.pack(pady=(5, 0))
+        
+        # Act
+        act_frame = ttk.Frame(main_frame); act_frame.pack(pady=10)
+        self.btn_run = ttk.Button(act_frame, text="START CONVERSION", command=self.start_conversion, bootstyle="primary-lg", width=20)
+        self.btn_run.pack(side=LEFT, padx=10)
+        ttk.Button(act_frame, text="EXIT", command=self.destroy, bootstyle="secondary", width=10).pack(side=LEFT, padx=10)
+        
+        self.toggle_threads()
+
+    def toggle_threads(self):
+        if self.parallel_var.get():
+            self.spin_threads.configure(state='normal')
+            self.cb_backend.configure(state='readonly')
+        else:
+            self.spin_threads.configure(state='disabled')
+            self.cb_backend.configure(state='disabled')
+        
+    def change_theme(self, event):
+        self.style.theme_use(self.theme_var.get())
+
+    def browse_source(self):
+        p = filedialog.askdirectory(); 
+        if p: self.source_path.set(p)
+        
+    def browse_output(self):
+        p = filedialog.askdirectory(); 
+        if p: self.output_path.set(p)
+        
+    def viewer_window(self, content):
+        top = ttk.Toplevel(self)
+        top.title("Log Viewer")
+        top.geometry("600x400")
+        st = scrolledtext.ScrolledText(top, width=80, height=20)
+        st.pack(fill=BOTH, expand=True)
+        st.insert(tk.END, content)
+        st.configure(state='disabled')
+
+    def view_logs(self):
+        if os.path.exists(LOG_FILE):
+            with open(LOG_FILE, 'r') as f: content = f.read()
+            if not content: content = "No errors logged."
+        else: content = "Log file not found."
+        self.viewer_window(content)
+        
+    def save_settings(self):
+        SETTINGS.update({
+            'Parallel_Processing': self.parallel_var.get(),
+            'Thread_Count': self.threads_var.get(),
+            'PDF_Quality': self.quality_var.get(),
+            'Enable_RAR': self.rar_var.get(),
+            'Theme': self.theme_var.get(),
+            'Landscape_Mode': self.landscape_var.get(),
+            'Output_Path': self.output_path.get(),
+            'Delete_Source': self.delete_var.get(),
+            'Execution_Backend': self.backend_var.get(),
+            'Max_Dimension': self.max_dim_var.get(),
+            'Target_Size_MB': self.target_var.get(),
+            'Chroma_Subsampling': self.subsampling_var.get(),
+            'Normalize_Page_Size': self.normalize_var.get(),
+            'Zero_Copy_Layout': self.zero_copy_var.get(),
+            'Auto_Crop': self.crop_var.get(),
+            'Skip_Blank_Pages': self.blank_var.get(),
+            'Detect_Spreads': self.spreads_var.get()
+        })
+        save_config(SETTINGS)
+        messagebox.showinfo("Saved", "Settings saved successfully!", parent=self)
+
+    def start_conversion(self):
+        if self.is_running: return
+        path = self.source_path.get()
+        if not path or not os.path.exists(path):
+            messagebox.showerror("Error", "Invalid Source Path")
+            return
+            
+        SETTINGS.update({
+            'Output_Path': self.output_path.get(),
+            'Landscape_Mode': self.landscape_var.get(),
+            'Thread_Count': self.threads_var.get(),
+            'PDF_Quality': self.quality_var.get(),
+            'Delete_Source': self.delete_var.get(),
+            'Execution_Backend': self.backend_var.get(),
+            'Max_Dimension': self.max_dim_var.get(),
+            'Target_Size_MB': self.target_var.get(),
+            'Chroma_Subsampling': self.subsampling_var.get(),
+            'Normalize_Page_Size': self.normalize_var.get(),
+            'Zero_Copy_Layout': self.zero_copy_var.get(),
+            'Auto_Crop': self.crop_var.get(),
+            'Skip_Blank_Pages': self.blank_var.get(),
+            'Detect_Spreads': self.spreads_var.get()
+        })
+        
+        self.is_running = True
+        self.btn_run.configure(state='disabled')
+        self.status_var.set("Scanning...")
+        self.progress_var.set(0)
+        self.report = RunReport()
+        self.refresh_stats()
+
+        threading.Thread(target=self.run_logic, args=(path,), daemon=True).start()
+
+    def refresh_stats(self):
+        """Live stats panel: throughput, memory and where the time goes, refreshed every second."""
+        if not self.report: return
+        s = self.report.summary()
+        busy = sum(s[f"{stage}_s"] for stage in STAGES) or 1
+        shares = "  ".join(f"{stage.title()} {s[f'{stage}_s'] / busy:.0%}" for stage in STAGES)
+        self.stats_var.set(
+            f"Images {s['images']} ({s['images_per_s']:.1f}/s)  |  Read {s['mb_read_per_s']:.1f} MB/s  |  "
+            f"Written {s['bytes_written'] / 1048576:.1f} MB  |  Peak {s['peak_rss_mb']:.0f} MB\n{shares}")
+        if self.is_running: self.after(1000, self.refresh_stats)
+
+    def run_logic(self, source_path):
+        core.ABORT_REQUESTED = False
+        try:
+            total = 0
+            completed = 0
+
+            def on_item_found(item):
+                nonlocal total
+                total += 1
+                self.after(0, lambda t=total: self.status_var.set(f"Found {t} items..."))
+
+            if self.parallel_var.get():
+                # Fraction of pages done for every item still in flight
+                partial = {}
+                lock = threading.Lock()
+
+                def report_progress():
+                    with lock: progress = (completed + sum(partial.values())) / max(total, 1) * 100
+                    self.after(0, lambda p=progress: self.progress_var.set(p))
+
+                def on_page_progress(path, done, count):
+                    with lock: partial[path] = done / count if count else 0
+                    report_progress()
+
+                def on_item_done(item, success):
+                    nonlocal completed
+                    with lock:
+                        completed += 1
+                        partial.pop(item['path'], None)
+                    report_progress()
+                    self.after(0, lambda c=completed, t=total: self.status_var.set(f"Processed {c}/{t}"))
+
+                run_work_items(scan_sources(source_path), on_item_done, on_page_progress,
+                               parallel=True, on_item_found=on_item_found, report=self.report)
+            else:
+                def on_item_done(item, success):
+                    nonlocal completed
+                    completed += 1
+                    progress = (completed / total) * 100
+                    self.after(0, lambda p=progress: self.progress_var.set(p))
+
+                run_work_items(
+                    scan_sources(source_path), on_item_done, parallel=False, on_item_found=on_item_found,
+                    report=self.report,
+                    on_item_start=lambda item: self.after(
+                        0, lambda n=os.path.basename(item['path']): self.status_var.set(f"Converting {n}")))
+
+            if total == 0:
+                self.after(0, lambda: messagebox.showinfo("Info", "No items found!"))
+                return
+
+            self.after(0, lambda: self.show_success(completed))
+            
+        except Exception as e:
+            logging.error(f"GUI Error: {e}")
+            self.after(0, lambda: messagebox.showerror("Error", f"Error: {e}"))
+        finally:
+            self.is_running = False
+            self.after(0, self.refresh_stats)
+            self.after(0, lambda: self.btn_run.configure(state='normal'))
+            self.after(0, lambda: self.status_var.set("Ready"))
+
+    def show_success(self, count):
+        messagebox.showinfo("Done", f"Processed {count} items.")
+        if winsound: winsound.MessageBeep()
+        notify('Image2PDF Finished', f'Successfully converted {count} items.')
@@ -4,39 +4,36 @@ import re
 import sys
 import logging
 import signal
-import gc
 import zipfile
 import io
+import csv
+import json
+import struct
+import math
+import time
+import hashlib
+import cProfile
+import contextlib
+import tracemalloc
 import configparser
 import threading
+import collections
+import multiprocessing
 import concurrent.futures
-import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
-import ctypes
-import webbrowser
-from PIL import Image, ImageTk
-from tqdm import tqdm
-
-import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
-from ttkbootstrap.widgets import ToolTip
-from plyer import notification
+import argparse
+from PIL import Image, ImageChops, features
 
-try:
-    import winsound
-except ImportError:
-    winsound = None
+# GUI toolkits (tkinter, ttkbootstrap), plyer, tqdm and NumPy are imported on first use only,
+# so headless runs and pool workers start fast and do not need them installed.
 
 try:
     import rarfile
 except ImportError:
     rarfile = None
 
-# --- High DPI Fix ---
-try:
-    ctypes.windll.shcore.SetProcessDpiAwareness(1)
-except Exception:
-    pass
+# gui.py does `import main`; when run as a script, hand it this module rather than a second copy
+if __name__ == "__main__":
+    sys.modules.setdefault('main', sys.modules[__name__])
 
 # --- Path Locking (Critical for .exe and Drag-and-Drop) ---
 if getattr(sys, 'frozen', False):
@@ -48,22 +45,65 @@ else:
 
 CONFIG_FILE = os.path.join(APP_DIR, 'config.ini')
 LOG_FILE = os.path.join(APP_DIR, 'errors.log')
+MANIFEST_FILE = os.path.join(APP_DIR, 'manifest.json')
+PROFILE_DIR = os.path.join(APP_DIR, 'profiles')
+STATUS_FILE = os.path.join(APP_DIR, 'status.json')
+JUNK_FILE = os.path.join(APP_DIR, 'junk.json')
+CORRUPT_FILE = os.path.join(APP_DIR, 'corrupt.json')
+CACHE_DIR = os.path.join(APP_DIR, 'cache')
 
 # --- Configuration ---
+DEFAULT_SETTINGS = {
+    'PDF_Quality': 100,
+    'Image_Extensions': {'.jpg', '.jpeg', '.png', '.webp', '.bmp'},
+    'Parallel_Processing': True,
+    'Thread_Count': 4,
+    'Enable_GUI': True,
+    'Enable_RAR': True,
+    'Theme': 'solar',
+    'Landscape_Mode': 'none',
+    'Output_Path': '',
+    'Delete_Source': False,
+    'JPEG_Passthrough': True,
+    'Execution_Backend': 'thread',
+    'Page_Workers': 0,
+    'Incremental': True,
+    'Scan_Depth': 1,
+    'Chroma_Subsampling': 'auto',
+    'Max_Dimension': 0,
+    'Target_Size_MB': 0.0,
+    'Color_Detection': True,
+    'Report_Path': '',
+    'Profile_Items': False,
+    'Watch_Interval': 2.0,
+    'Watch_Settle': 5.0,
+    'Status_Path': '',
+    'Cache_Size_MB': 0,
+    'Cache_Path': '',
+    'Cache_Pages': True,
+    'Normalize_Page_Size': False,
+    'Zero_Copy_Layout': False,
+    'Prefetch_Depth': 0,
+    'Prefetch_MB': 256,
+    'Writers_Per_Device': 0,
+    'Junk_Index': '',
+    'Skip_Junk': False,
+    'Merge_Max_Pages': 0,
+    'Merge_Max_MB': 0.0,
+    'Auto_Crop': False,
+    'Skip_Blank_Pages': False,
+    'Detect_Spreads': False,
+    'Analysis_Tolerance': 24,
+    'Adaptive_Scheduling': True,
+    'Memory_Budget_MB': 0,
+    'Preflight_Check': 'off',
+    'Quarantine_Path': '',
+    'Corrupt_Report_Path': ''
+}
+
 def load_config():
     config = configparser.ConfigParser()
-    defaults = {
-        'PDF_Quality': 100,
-        'Image_Extensions': {'.jpg', '.jpeg', '.png', '.webp', '.bmp'},
-        'Parallel_Processing': True,
-        'Thread_Count': 4,
-        'Enable_GUI': True,
-        'Enable_RAR': True,
-        'Theme': 'solar',
-        'Landscape_Mode': 'none',
-        'Output_Path': '',
-        'Delete_Source': False
-    }
+    defaults = dict(DEFAULT_SETTINGS)
     
     if not os.path.exists(CONFIG_FILE):
         return defaults
@@ -85,7 +125,42 @@ def load_config():
         'Theme': general.get('Theme', 'solar'),
         'Landscape_Mode': general.get('Landscape_Mode', 'none'),
         'Output_Path': general.get('Output_Path', ''),
-        'Delete_Source': general.getboolean('Delete_Source', False)
+        'Delete_Source': general.getboolean('Delete_Source', False),
+        'JPEG_Passthrough': general.getboolean('JPEG_Passthrough', True),
+        'Execution_Backend': general.get('Execution_Backend', 'thread'),
+        'Page_Workers': general.getint('Page_Workers', 0),
+        'Incremental': general.getboolean('Incremental', True),
+        'Scan_Depth': general.getint('Scan_Depth', 1),
+        'Chroma_Subsampling': general.get('Chroma_Subsampling', 'auto'),
+        'Max_Dimension': general.getint('Max_Dimension', 0),
+        'Target_Size_MB': general.getfloat('Target_Size_MB', 0.0),
+        'Color_Detection': general.getboolean('Color_Detection', True),
+        'Report_Path': general.get('Report_Path', ''),
+        'Profile_Items': general.getboolean('Profile_Items', False),
+        'Watch_Interval': general.getfloat('Watch_Interval', 2.0),
+        'Watch_Settle': general.getfloat('Watch_Settle', 5.0),
+        'Status_Path': general.get('Status_Path', ''),
+        'Cache_Size_MB': general.getint('Cache_Size_MB', 0),
+        'Cache_Path': general.get('Cache_Path', ''),
+        'Cache_Pages': general.getboolean('Cache_Pages', True),
+        'Normalize_Page_Size': general.getboolean('Normalize_Page_Size', False),
+        'Zero_Copy_Layout': general.getboolean('Zero_Copy_Layout', False),
+        'Prefetch_Depth': general.getint('Prefetch_Depth', 0),
+        'Prefetch_MB': general.getint('Prefetch_MB', 256),
+        'Writers_Per_Device': general.getint('Writers_Per_Device', 0),
+        'Junk_Index': general.get('Junk_Index', ''),
+        'Skip_Junk': general.getboolean('Skip_Junk', False),
+        'Merge_Max_Pages': general.getint('Merge_Max_Pages', 0),
+        'Merge_Max_MB': general.getfloat('Merge_Max_MB', 0.0),
+        'Auto_Crop': general.getboolean('Auto_Crop', False),
+        'Skip_Blank_Pages': general.getboolean('Skip_Blank_Pages', False),
+        'Detect_Spreads': general.getboolean('Detect_Spreads', False),
+        'Analysis_Tolerance': general.getint('Analysis_Tolerance', 24),
+        'Adaptive_Scheduling': general.getboolean('Adaptive_Scheduling', True),
+        'Memory_Budget_MB': general.getint('Memory_Budget_MB', 0),
+        'Preflight_Check': general.get('Preflight_Check', 'off'),
+        'Quarantine_Path': general.get('Quarantine_Path', ''),
+        'Corrupt_Report_Path': general.get('Corrupt_Report_Path', '')
     }
 
 def save_config(settings):
@@ -100,7 +175,42 @@ def save_config(settings):
         'Theme': settings['Theme'],
         'Landscape_Mode': settings['Landscape_Mode'],
         'Output_Path': settings['Output_Path'],
-        'Delete_Source': str(settings['Delete_Source'])
+        'Delete_Source': str(settings['Delete_Source']),
+        'JPEG_Passthrough': str(settings['JPEG_Passthrough']),
+        'Execution_Backend': settings['Execution_Backend'],
+        'Page_Workers': str(settings['Page_Workers']),
+        'Incremental': str(settings['Incremental']),
+        'Scan_Depth': str(settings['Scan_Depth']),
+        'Chroma_Subsampling': settings['Chroma_Subsampling'],
+        'Max_Dimension': str(settings['Max_Dimension']),
+        'Target_Size_MB': str(settings['Target_Size_MB']),
+        'Color_Detection': str(settings['Color_Detection']),
+        'Report_Path': settings['Report_Path'],
+        'Profile_Items': str(settings['Profile_Items']),
+        'Watch_Interval': str(settings['Watch_Interval']),
+        'Watch_Settle': str(settings['Watch_Settle']),
+        'Status_Path': settings['Status_Path'],
+        'Cache_Size_MB': str(settings['Cache_Size_MB']),
+        'Cache_Path': settings['Cache_Path'],
+        'Cache_Pages': str(settings['Cache_Pages']),
+        'Normalize_Page_Size': str(settings['Normalize_Page_Size']),
+        'Zero_Copy_Layout': str(settings['Zero_Copy_Layout']),
+        'Prefetch_Depth': str(settings['Prefetch_Depth']),
+        'Prefetch_MB': str(settings['Prefetch_MB']),
+        'Writers_Per_Device': str(settings['Writers_Per_Device']),
+        'Junk_Index': settings['Junk_Index'],
+        'Skip_Junk': str(settings['Skip_Junk']),
+        'Merge_Max_Pages': str(settings['Merge_Max_Pages']),
+        'Merge_Max_MB': str(settings['Merge_Max_MB']),
+        'Auto_Crop': str(settings['Auto_Crop']),
+        'Skip_Blank_Pages': str(settings['Skip_Blank_Pages']),
+        'Detect_Spreads': str(settings['Detect_Spreads']),
+        'Analysis_Tolerance': str(settings['Analysis_Tolerance']),
+        'Adaptive_Scheduling': str(settings['Adaptive_Scheduling']),
+        'Memory_Budget_MB': str(settings['Memory_Budget_MB']),
+        'Preflight_Check': settings['Preflight_Check'],
+        'Quarantine_Path': settings['Quarantine_Path'],
+        'Corrupt_Report_Path': settings['Corrupt_Report_Path']
     }
     with open(CONFIG_FILE, 'w') as configfile:
         config.write(configfile)
@@ -115,11 +225,16 @@ logging.basicConfig(
 )
 
 ABORT_REQUESTED = False
+# Set while a process pool is running so Ctrl+C also reaches the child processes
+ABORT_EVENT = None
+# Page progress channel back to the parent, only set inside pool child processes
+PROGRESS_QUEUE = None
 
 def signal_handler(signum, frame):
     global ABORT_REQUESTED
-    print("\n\nAborting... Please wait for cleanup.")
+    print("\n\nAborting... Please wait for cleanup.", file=sys.stderr)
     ABORT_REQUESTED = True
+    if ABORT_EVENT is not None: ABORT_EVENT.set()
 
 signal.signal(signal.SIGINT, signal_handler)
 
@@ -127,9 +242,184 @@ def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower()
             for text in re.split('([0-9]+)', s)]
 
+# Modes the PDF writer stores natively; everything else is flattened to one of them
+NATIVE_MODES = {'1', 'L', 'P', 'RGB'}
+PAGE_WHITE = {'1': 1, 'L': 255, 'RGB': (255, 255, 255)}
+
+# --- Instrumentation ---
+STAGES = ('plan', 'read', 'decode', 'analyze', 'transform', 'encode', 'write')
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB (0 if the platform cannot tell)."""
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+class ItemStats:
+    """Stage timings and byte counts for one work item, shared by the page pool threads working on it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.images = 0
+        self.pages = 0
+        self.cache_hits = 0
+        self.duplicates = 0
+        self.junk = 0
+        self.blank = 0
+
+    def add(self, stage=None, seconds=0.0, bytes_read=0, cache_hits=0, duplicates=0, junk=0, blank=0):
+        with self.lock:
+            if stage: self.stages[stage] += seconds
+            self.bytes_read += bytes_read
+            self.cache_hits += cache_hits
+            self.duplicates += duplicates
+            self.junk += junk
+            self.blank += blank
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def report(self, item, success, seconds=0.0):
+        record = {
+            'path': item['path'],
+            'type': item['type'],
+            'success': success,
+            'skipped': False,
+            'seconds': round(seconds, 4),
+            'images': self.images,
+            'pages': self.pages,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'cache_hits': self.cache_hits,
+            'duplicates': self.duplicates,
+            'junk_images': self.junk,
+            'blank_pages': self.blank,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }
+        record.update((f"{stage}_s", round(value, 4)) for stage, value in self.stages.items())
+        return record
+
+def timed(stats, stage):
+    return stats.timed(stage) if stats else contextlib.nullcontext()
+
+class RunReport:
+    """Collects the item reports of one run; feeds the GUI stats panel and the JSON/CSV run report."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.items = []
+        self.progress = {}
+
+    def add(self, record):
+        with self.lock:
+            self.items.append(record)
+            self.progress.pop(record['path'], None)
+
+    def add_skipped(self, item):
+        record = ItemStats().report(item, True)
+        record['skipped'] = True
+        self.add(record)
+
+    def note_progress(self, path, done):
+        with self.lock: self.progress[path] = done
+
+    def summary(self):
+        with self.lock:
+            items = list(self.items)
+            in_flight = sum(self.progress.values())
+        elapsed = time.perf_counter() - self.started
+        converted = [r for r in items if not r['skipped']]
+        summary = {
+            'items': len(items),
+            'succeeded': sum(1 for r in items if r['success']),
+            'skipped': len(items) - len(converted),
+            'images': sum(r['images'] for r in converted) + in_flight,
+            'pages': sum(r['pages'] for r in converted),
+            'bytes_read': sum(r['bytes_read'] for r in converted),
+            'bytes_written': sum(r['bytes_written'] for r in converted),
+            'cache_hits': sum(r['cache_hits'] for r in converted),
+            'duplicates': sum(r['duplicates'] for r in converted),
+            'junk_images': sum(r['junk_images'] for r in converted),
+            'blank_pages': sum(r['blank_pages'] for r in converted),
+            'elapsed_s': round(elapsed, 3),
+            'peak_rss_mb': round(max([peak_rss_mb()] + [r['peak_rss_mb'] for r in items]), 1),
+        }
+        summary['images_per_s'] = round(summary['images'] / elapsed, 2) if elapsed else 0.0
+        summary['mb_read_per_s'] = round(summary['bytes_read'] / elapsed / (1024 * 1024), 2) if elapsed else 0.0
+        summary.update((f"{stage}_s", round(sum(r[f"{stage}_s"] for r in converted), 4)) for stage in STAGES)
+        return summary
+
+    def write(self, path):
+        """Writes the report as CSV (one row per item) if path ends in .csv, otherwise as JSON."""
+        with self.lock: items = list(self.items)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if path.lower().endswith('.csv'):
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.DictWriter(f, fieldnames=list(items[0]) if items else ['path'])
+                    writer.writeheader()
+                    writer.writerows(items)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump({'summary': self.summary(), 'items': items}, f, indent=2)
+        except OSError as e:
+            logging.error(f"Could not write run report {path}: {e}")
+
+# Only one profiler can be active per interpreter (Python 3.12+ raises otherwise), and
+# tracemalloc peaks are process-wide, so profiled items of one process run one at a time
+PROFILE_LOCK = threading.Lock()
+
+def start_profiling():
+    if not tracemalloc.is_tracing(): tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def save_profile(item, profiler):
+    """Dumps the item's cProfile stats (.prof) and its largest Python allocations (.mem.txt) to PROFILE_DIR."""
+    profiler.disable()
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{os.path.basename(item['path'])}.{os.getpid()}")
+        profiler.dump_stats(base + '.prof')
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:25]
+        with open(base + '.mem.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Traced Python memory: current {current / 1048576:.1f} MB, peak {peak / 1048576:.1f} MB\n")
+            f.write("(Pillow pixel buffers are allocated in C and are not included.)\n\n")
+            f.writelines(f"{stat}\n" for stat in top)
+    except OSError as e:
+        logging.error(f"Could not save profile for {item['path']}: {e}")
+
 def optimize_image(img, mode='none'):
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
+    if img.mode not in NATIVE_MODES:
+        img = img.convert('L' if img.mode in ('LA', 'I', 'I;16', 'F') else 'RGB')
     
     width, height = img.size
     
@@ -151,123 +441,2437 @@ def optimize_image(img, mode='none'):
             return [right_part, left_part]
 
         else: # letterbox
+            if img.mode == 'P': img = img.convert('RGB')
             new_height = int(width * 1.3)
-            new_bg = Image.new('RGB', (width, new_height), (255, 255, 255))
+            new_bg = Image.new(img.mode, (width, new_height), PAGE_WHITE[img.mode])
             y_offset = (new_height - height) // 2
             new_bg.paste(img, (0, y_offset))
             return [new_bg]
     else:
         return [img.copy()]
 
-def process_images_to_pdf(image_list, pdf_path, title):
-    if not image_list: return False
+# --- Page Analysis ---
+# Optional (needs NumPy): a downsampled grayscale copy of each page, about
+# ANALYSIS_SIZE pixels on its long side, is checked for ink, i.e. pixels further
+# than Analysis_Tolerance from the paper colour. This costs a few milliseconds per page.
+ANALYSIS_SIZE = 256
+BLANK_INK = 0.002      # pages with less ink than this fraction are blank...
+BLANK_PAPER = 192      # ...if their paper is at least this light; flat black or colour pages are art
+CROP_NOISE = 0.005     # rows/columns with less ink than this are margin
+CROP_MIN = 0.98        # content boxes covering more of the page are not worth cropping
+GUTTER_BAND = 0.03     # the fold is looked for within this fraction of the width around the centre
+GUTTER_INK = 0.02      # a column this clear (or this close to solid) is a gutter
+np = None
+NUMPY_MISSING = False
+
+def load_numpy():
+    """Imports NumPy on first use; False (logged once) where it is not installed."""
+    global np, NUMPY_MISSING
+    if np is None and not NUMPY_MISSING:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            NUMPY_MISSING = True
+            logging.error("Auto_Crop, Skip_Blank_Pages and Detect_Spreads are ignored: NumPy is not installed")
+    return np is not None
+
+def needs_analysis(options):
+    return options['auto_crop'] or options['skip_blank'] or options['detect_spreads']
+
+def analyze_page(img, options):
+    """Returns {'blank', 'box', 'spread'} for a decoded page.
+
+    box is the content bounding box in img's pixels, or None when there is no margin worth
+    cropping. spread is False for wide pages without a centre gutter (only checked with
+    detect_spreads), which split mode then keeps whole.
+    """
+    factor = max(1, max(img.size) // ANALYSIS_SIZE)
+    small = img.convert('L') if img.mode in ('1', 'P') else img
+    if factor > 4:
+        # Averaging every pixel costs more than the analysis itself; every few pixels are plenty
+        small = small.resize((max(1, img.width // factor) * 4, max(1, img.height // factor) * 4),
+                             Image.Resampling.NEAREST)
+        factor = 4
+    if factor > 1: small = small.reduce(factor)
+    gray = np.asarray(small.convert('L'), dtype=np.int16)
+    height, width = gray.shape
+    # The paper colour is the median of the outermost rows and columns
+    border = np.concatenate([gray[0], gray[-1], gray[:, 0], gray[:, -1]])
+    paper = int(np.median(border))
+    ink = np.abs(gray - paper) > options['tolerance']
+    verdict = {'blank': False, 'box': None, 'spread': True}
+    if paper >= BLANK_PAPER and ink.mean() < BLANK_INK:
+        verdict['blank'] = True
+        return verdict
+
+    if options['auto_crop']:
+        rows = np.flatnonzero(ink.mean(axis=1) > CROP_NOISE)
+        cols = np.flatnonzero(ink.mean(axis=0) > CROP_NOISE)
+        if rows.size and cols.size:
+            top, bottom, left, right = int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+            if (bottom - top) * (right - left) < CROP_MIN * width * height:
+                # One analysis pixel of slack on each side, so no content is lost to rounding
+                sx, sy = img.width / width, img.height / height
+                verdict['box'] = (max(0, int((left - 1) * sx)), max(0, int((top - 1) * sy)),
+                                  min(img.width, math.ceil((right + 1) * sx)),
+                                  min(img.height, math.ceil((bottom + 1) * sy)))
+                ink = ink[top:bottom, left:right]
+
+    if options['detect_spreads'] and ink.shape[1] > ink.shape[0]:
+        centre = ink.shape[1] // 2
+        band = max(1, int(ink.shape[1] * GUTTER_BAND))
+        column_ink = ink[:, centre - band:centre + band + 1].mean(axis=0)
+        # Clear relative to the page too, so sparse line art does not look like it has a gutter
+        clear = column_ink.min() < min(GUTTER_INK, ink.mean() / 4)
+        verdict['spread'] = bool(clear or column_ink.max() > 1 - GUTTER_INK)
+    return verdict
+
+def preview_image(data):
+    """Cheap grayscale decode of JPEG bytes at 1/8 size, for analysing passthrough pages."""
+    img = Image.open(io.BytesIO(data))
+    img.draft('L', (max(1, img.width // 8), max(1, img.height // 8)))
+    img.load()
+    return img
+
+# --- PDF Writer ---
+# Pages are written at the same 100 DPI Pillow's PDF plugin used, so page sizes
+# stay identical to earlier releases.
+PDF_RESOLUTION = 100.0
+JPEG_COLORSPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB'}
+
+class PdfImage:
+    """An encoded image stream, ready to be embedded as a PDF XObject.
+
+    dpi sets the page size: downscaled pages get a lower dpi so they keep their original size.
+    layout is a Landscape_Mode the writer applies as page geometry instead of pixels ('none'
+    for a plain page, see Zero_Copy_Layout).
+    """
+    __slots__ = ('data', 'width', 'height', 'colorspace', 'bpc', 'filter', 'dpi', 'decode_parms', 'layout')
+
+    def __init__(self, data, width, height, colorspace='/DeviceRGB', bpc=8, filter='/DCTDecode',
+                 dpi=PDF_RESOLUTION, decode_parms=None, layout='none'):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.colorspace = colorspace
+        self.bpc = bpc
+        self.filter = filter
+        self.dpi = dpi
+        self.decode_parms = decode_parms
+        self.layout = layout
+
+def pdf_number(value):
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return text if text not in ('', '-0') else '0'
+
+def pdf_string(text):
+    try:
+        raw = text.encode('ascii')
+    except UnicodeEncodeError:
+        return '<' + (b'\xfe\xff' + text.encode('utf-16-be')).hex().upper() + '>'
+    raw = raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return '(' + raw.decode('ascii') + ')'
+
+class PdfWriter:
+    """Minimal PDF writer: one image XObject per distinct added image, each object written as soon as it is added.
+
+    Images are keyed by a hash of their encoded stream, so a repeated page (a credit page in every
+    chapter, blank halves of split spreads) is stored once and shown by every page using it.
+    """
+    CATALOG_ID, PAGES_ID, INFO_ID = 1, 2, 3
+
+    def __init__(self, fp, title=None, producer="Image2PDF Script"):
+        self.fp = fp
+        self.title = title
+        self.producer = producer
+        self.offsets = {}
+        self.page_ids = []
+        self.images = {}
+        self.shared = 0
+        self.outline = []
+        self.next_id = self.INFO_ID + 1
+        self.fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.fp.tell()
+        if stream is None:
+            self.fp.write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+            return
+        self.fp.write(f"{obj_id} 0 obj\n{body}\nstream\n".encode('latin-1'))
+        self.fp.write(stream)
+        self.fp.write(b"\nendstream\nendobj\n")
+
+    def add_image(self, image):
+        key = (hashlib.blake2b(image.data, digest_size=16).digest(), image.width, image.height,
+               image.colorspace, image.bpc, image.filter, image.decode_parms)
+        obj_id = self.images.get(key)
+        if obj_id:
+            self.shared += 1
+            return obj_id
+        obj_id = self.images[key] = self.new_id()
+        body = (f"<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+                f"/ColorSpace {image.colorspace} /BitsPerComponent {image.bpc} "
+                f"/Filter {image.filter} /Length {len(image.data)}")
+        if image.decode_parms: body += f" /DecodeParms {image.decode_parms}"
+        body += " >>"
+        self.write_object(obj_id, body, image.data)
+        return obj_id
+
+    def add_page(self, image):
+        """Adds the page(s) showing image, laid out as image.layout says; returns how many were added."""
+        xobject_id = self.add_image(image)
+        scale = 72.0 / image.dpi
+        width, height = image.width * scale, image.height * scale
+        placement = f"q {pdf_number(width)} 0 0 {pdf_number(height)}"
+        if image.layout == 'split':
+            # Both halves of the spread show the one image XObject, shifted under the page;
+            # right half first, as optimize_image orders them
+            left = image.width // 2 * scale
+            self.write_page(xobject_id, width - left, height, f"{placement} {pdf_number(-left)} 0 cm /Im0 Do Q")
+            self.write_page(xobject_id, left, height, f"{placement} 0 0 cm /Im0 Do Q")
+            return 2
+        if image.layout == 'letterbox':
+            page_height = int(image.width * 1.3)
+            bottom = (page_height - image.height) - (page_height - image.height) // 2
+            page_height *= scale
+            self.write_page(xobject_id, width, page_height,
+                            f"q 1 g 0 0 {pdf_number(width)} {pdf_number(page_height)} re f Q "
+                            f"{placement} 0 {pdf_number(bottom * scale)} cm /Im0 Do Q")
+            return 1
+        self.write_page(xobject_id, width, height, f"{placement} 0 0 cm /Im0 Do Q",
+                        rotate=90 if image.layout == 'rotate' else 0)
+        return 1
+
+    def write_page(self, xobject_id, width, height, content, rotate=0):
+        content = content.encode('latin-1')
+        content_id = self.new_id()
+        self.write_object(content_id, f"<< /Length {len(content)} >>", content)
+        page_id = self.new_id()
+        self.write_object(page_id, (
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R /MediaBox [0 0 {pdf_number(width)} {pdf_number(height)}] "
+            + (f"/Rotate {rotate} " if rotate else "") +
+            f"/Resources << /XObject << /Im0 {xobject_id} 0 R >> >> /Contents {content_id} 0 R >>"))
+        self.page_ids.append(page_id)
+
+    def add_bookmark(self, title):
+        """Adds an outline entry pointing at the next page added."""
+        self.outline.append((title, len(self.page_ids)))
+
+    def write_outline(self):
+        entries = [(title, page) for title, page in self.outline if page < len(self.page_ids)]
+        if not entries: return None
+        root_id = self.new_id()
+        ids = [self.new_id() for _ in entries]
+        for i, (title, page) in enumerate(entries):
+            body = f"<< /Title {pdf_string(title)} /Parent {root_id} 0 R /Dest [{self.page_ids[page]} 0 R /Fit]"
+            if i: body += f" /Prev {ids[i - 1]} 0 R"
+            if i + 1 < len(ids): body += f" /Next {ids[i + 1]} 0 R"
+            self.write_object(ids[i], body + " >>")
+        self.write_object(root_id, f"<< /Type /Outlines /First {ids[0]} 0 R /Last {ids[-1]} 0 R /Count {len(ids)} >>")
+        return root_id
+
+    def close(self):
+        outline_id = self.write_outline()
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self.write_object(self.PAGES_ID, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>")
+        catalog = f"/Type /Catalog /Pages {self.PAGES_ID} 0 R"
+        if outline_id: catalog += f" /Outlines {outline_id} 0 R /PageMode /UseOutlines"
+        self.write_object(self.CATALOG_ID, f"<< {catalog} >>")
+        info = f"/Producer {pdf_string(self.producer)}"
+        if self.title: info = f"/Title {pdf_string(self.title)} " + info
+        self.write_object(self.INFO_ID, f"<< {info} >>")
+
+        xref_offset = self.fp.tell()
+        lines = [f"xref\n0 {self.next_id}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{self.offsets[obj_id]:010d} 00000 n \n" for obj_id in range(1, self.next_id))
+        lines.append(f"trailer\n<< /Size {self.next_id} /Root {self.CATALOG_ID} 0 R /Info {self.INFO_ID} 0 R >>\n")
+        lines.append(f"startxref\n{xref_offset}\n%%EOF\n")
+        self.fp.write(''.join(lines).encode('latin-1'))
+
+# --- Encoding ---
+SUBSAMPLING = {'4:4:4': 0, '4:2:2': 1, '4:2:0': 2}
+# Target_Size_MB: pages sampled per document, and the lowest quality the search may pick
+TARGET_SAMPLE_PAGES = 6
+TARGET_MIN_QUALITY = 20
+
+def encoding_options():
+    """Per-document page and encoder options, read from SETTINGS once per document."""
+    quality = max(1, min(100, SETTINGS['PDF_Quality']))
+    detect_spreads = SETTINGS['Detect_Spreads'] and SETTINGS['Landscape_Mode'] == 'split'
+    analysis = (SETTINGS['Auto_Crop'] or SETTINGS['Skip_Blank_Pages'] or detect_spreads) and load_numpy()
+    return {
+        'mode': SETTINGS['Landscape_Mode'],
+        'quality': quality,
+        'subsampling': SETTINGS['Chroma_Subsampling'],
+        'max_dimension': SETTINGS['Max_Dimension'],
+        # Original JPEG bytes are only kept when nothing asks for a smaller file
+        'passthrough': SETTINGS['JPEG_Passthrough'] and quality == 100 and not SETTINGS['Target_Size_MB'],
+        'color_detection': SETTINGS['Color_Detection'],
+        'geometry': SETTINGS['Zero_Copy_Layout'],
+        'auto_crop': analysis and SETTINGS['Auto_Crop'],
+        'skip_blank': analysis and SETTINGS['Skip_Blank_Pages'],
+        'detect_spreads': analysis and detect_spreads,
+        'tolerance': SETTINGS['Analysis_Tolerance']
+    }
+
+LOSSLESS_OPTIONS = {'mode': 'none', 'quality': 100, 'subsampling': 'auto', 'max_dimension': 0,
+                    'passthrough': False, 'color_detection': False, 'geometry': False,
+                    'auto_crop': False, 'skip_blank': False, 'detect_spreads': False, 'tolerance': 0}
+# Largest channel difference still treated as grey: exact for lossless sources,
+# loose enough to absorb chroma noise in JPEGs
+GRAY_TOLERANCE = {'JPEG': 8}
+
+def reduce_colors(img, source_format=None):
+    """Returns img in the smallest lossless mode: RGB pages that are really grey become L,
+    and grey pages holding only pure black and white become 1-bit."""
+    if img.mode == 'RGB':
+        tolerance = GRAY_TOLERANCE.get(source_format, 0)
+        red, green, blue = img.split()
+        try:
+            if (ImageChops.difference(red, green).getextrema()[1] <= tolerance
+                    and ImageChops.difference(green, blue).getextrema()[1] <= tolerance):
+                gray = img.convert('L')
+                img.close()
+                img = gray
+        finally:
+            for band in (red, green, blue): band.close()
+    if img.mode == 'L':
+        histogram = img.histogram()
+        if histogram[0] + histogram[255] == img.width * img.height:
+            bilevel = img.convert('1', dither=Image.Dither.NONE)
+            img.close()
+            img = bilevel
+    return img
+
+def page_extent(width, height, mode):
+    """Longest edge of the output pages a width x height image makes in Landscape_Mode mode."""
+    if width > height and mode == 'split': return max(width - width // 2, height)
+    if width > height and mode == 'letterbox': return int(width * 1.3)
+    return max(width, height)
+
+def fit_to_max_dimension(img, options, scale=1.0):
+    """Downscales img so its longest edge fits max_dimension; returns the image and its page dpi.
+
+    scale is how far the page was already shrunk while loading (see load_scale).
+    """
+    max_dimension = options['max_dimension']
+    # Zero-copy layouts reach here before split/letterbox, so size for the pages they will make
+    longest = page_extent(*img.size, options['mode']) if options['geometry'] else max(img.size)
+    if not max_dimension or longest <= max_dimension: return img, PDF_RESOLUTION * scale
+    if img.mode in ('1', 'P'):
+        # Palette and 1-bit images only resample with NEAREST; scale them with full tones
+        converted = img.convert('L' if img.mode == '1' else 'RGB')
+        img.close()
+        img = converted
+    ratio = max_dimension / longest
+    size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+    resized = img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    img.close()
+    return resized, PDF_RESOLUTION * scale * ratio
+
+def png_stream(img):
+    """Encodes img as PNG and returns (bits, palette, data); data is the IDAT zlib stream, which
+    PDF reads directly as /FlateDecode with a PNG /Predictor."""
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG", compress_level=6)
+    png = buffer.getbuffer()
+    bits, palette, idat = 8, None, []
+    pos = 8
+    while pos < len(png):
+        length, chunk_type = struct.unpack('>I4s', png[pos:pos + 8])
+        chunk = png[pos + 8:pos + 8 + length]
+        if chunk_type == b'IHDR': bits = chunk[8]
+        elif chunk_type == b'PLTE': palette = bytes(chunk)
+        elif chunk_type == b'IDAT': idat.append(bytes(chunk))
+        pos += 12 + length
+    return bits, palette, b''.join(idat)
+
+def flate_image(img, dpi):
+    bits, palette, data = png_stream(img)
+    colors = 3 if img.mode == 'RGB' else 1
+    if img.mode == 'P':
+        colorspace = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+    else:
+        colorspace = '/DeviceRGB' if colors == 3 else '/DeviceGray'
+    parms = f"<< /Predictor 15 /Colors {colors} /BitsPerComponent {bits} /Columns {img.width} >>"
+    return PdfImage(data, img.width, img.height, colorspace, bits, '/FlateDecode', dpi, parms)
+
+def ccitt_image(img, dpi):
+    """Encodes a 1-bit image as CCITT Group 4 via libtiff; returns None if that is unavailable."""
+    if not features.check('libtiff'): return None
+    buffer = io.BytesIO()
+    img.save(buffer, "TIFF", compression="group4", tiffinfo={278: img.height})
+    buffer.seek(0)
+    with Image.open(buffer) as tiff:
+        offsets, counts = tiff.tag_v2.get(273), tiff.tag_v2.get(279)
+        black_is_1 = tiff.tag_v2.get(262) == 1
+    if not offsets or len(offsets) != 1: return None
+    data = buffer.getvalue()[offsets[0]:offsets[0] + counts[0]]
+    parms = (f"<< /K -1 /Columns {img.width} /Rows {img.height} "
+             f"/BlackIs1 {'true' if black_is_1 else 'false'} >>")
+    return PdfImage(data, img.width, img.height, '/DeviceGray', 1, '/CCITTFaxDecode', dpi, parms)
+
+def encode_image(img, options=LOSSLESS_OPTIONS, dpi=PDF_RESOLUTION, source_format=None):
+    """Encodes one page with the filter that suits its mode: CCITT G4 for 1-bit, Flate for palette
+    images and for grey pages from lossless sources at quality 100, JPEG otherwise."""
+    quality = options['quality']
+    if img.mode == '1': return ccitt_image(img, dpi) or flate_image(img, dpi)
+    if img.mode == 'P': return flate_image(img, dpi)
+    if img.mode == 'L' and quality == 100 and source_format != 'JPEG': return flate_image(img, dpi)
+
+    subsampling = options['subsampling']
+    if subsampling not in SUBSAMPLING:
+        # Quality 100 keeps full chroma resolution (lossless intent)
+        subsampling = '4:4:4' if quality == 100 else '4:2:0'
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality, subsampling=SUBSAMPLING[subsampling])
+    return PdfImage(buffer.getvalue(), img.width, img.height, JPEG_COLORSPACES[img.mode], dpi=dpi)
+
+def can_passthrough(img, options):
+    """True if img, opened but not yet decoded, can be embedded as its original JPEG bytes."""
+    if not options['passthrough']: return False
+    if img.format != 'JPEG' or img.mode not in JPEG_COLORSPACES: return False
+    width, height = img.size
+    if options['geometry']:
+        return not options['max_dimension'] or page_extent(width, height, options['mode']) <= options['max_dimension']
+    if options['max_dimension'] and max(width, height) > options['max_dimension']: return False
+    return width <= height or options['mode'] == 'none'
+
+def image_info(img):
+    """Header facts about an opened, not yet decoded image."""
+    return {'width': img.width, 'height': img.height, 'mode': img.mode, 'format': img.format,
+            'frames': getattr(img, 'n_frames', 1)}
+
+# Shrink-on-load stops at this multiple of the final size and leaves the rest to
+# the LANCZOS resize, as Image.thumbnail does
+LOAD_REDUCING_GAP = 2.0
+
+def page_layout(width, height, options, verdict=None):
+    """The layout the PDF writer gives a page of this size: the Landscape_Mode for wide pages
+    with Zero_Copy_Layout (unless analysis found no spread to split), otherwise 'none'."""
+    if not options['geometry'] or width <= height: return 'none'
+    if verdict and not verdict['spread']: return 'none'
+    return options['mode']
+
+def load_scale(img, options):
+    """How far img may be shrunk while loading, given the page size max_dimension will leave."""
+    max_dimension = options['max_dimension']
+    if not max_dimension: return 1.0
+    return min(1.0, max_dimension * LOAD_REDUCING_GAP / page_extent(*img.size, options['mode']))
+
+def load_pages(source, options, info=None):
+    """Returns (pages, source_format, scale, layout) for one source image: a file path, raw bytes or a zero-argument opener.
+
+    When max_dimension will downscale the pages anyway, JPEGs are decoded at 1/2, 1/4 or 1/8 size
+    (DCT scaling) and other images are shrunk with reduce() before any transform; scale is the
+    resulting size relative to the source. layout is the Landscape_Mode the PDF writer applies
+    to the pages (see Zero_Copy_Layout), 'none' otherwise. Blank pages come back as no pages
+    with skip_blank (see analyze_page). If info is a dict, it is filled with the image's header
+    facts (see image_info).
+    """
+    stats = options.get('stats')
+    with timed(stats, 'read'):
+        if isinstance(source, bytes): fp = io.BytesIO(source)
+        elif isinstance(source, str): fp = open(source, 'rb')
+        else: fp = source()
+    with fp:
+        with timed(stats, 'decode'):
+            img = Image.open(fp)
+        with img:
+            if info is not None: info.update(image_info(img))
+            # Image.open only parses the header; passthrough pages are never decoded
+            if can_passthrough(img, options):
+                with timed(stats, 'read'):
+                    if isinstance(source, bytes):
+                        data = source
+                    else:
+                        fp.seek(0)
+                        data = fp.read()
+                # The header alone does not show a cut-off file; those are decoded below instead
+                if jpeg_complete(data):
+                    if stats: stats.add(bytes_read=len(data))
+                    verdict = None
+                    if needs_analysis(options):
+                        with timed(stats, 'analyze'), preview_image(data) as preview:
+                            verdict = analyze_page(preview, options)
+                        if verdict['blank'] and options['skip_blank']:
+                            if stats: stats.add(blank=1)
+                            return [], img.format, 1.0, 'none'
+                    # Pages to be cropped are decoded below after all
+                    if not verdict or not verdict['box']:
+                        layout = page_layout(img.width, img.height, options, verdict)
+                        return [PdfImage(data, img.width, img.height, JPEG_COLORSPACES[img.mode], layout=layout)], \
+                            img.format, 1.0, layout
+            width = img.width
+            scale = load_scale(img, options)
+            with timed(stats, 'decode'):
+                if scale < 1 and img.format == 'JPEG':
+                    img.draft(img.mode, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+                img.load()
+            if stats: stats.add(bytes_read=fp.tell())
+            with timed(stats, 'transform'):
+                loaded = img
+                factor = int(img.width / (width * scale))
+                if factor >= 2 and img.mode not in ('1', 'P'): loaded = img.reduce(factor)
+            scale = loaded.width / width
+            try:
+                verdict = None
+                if needs_analysis(options):
+                    with timed(stats, 'analyze'): verdict = analyze_page(loaded, options)
+                    if verdict['blank'] and options['skip_blank']:
+                        if stats: stats.add(blank=1)
+                        return [], img.format, scale, 'none'
+                with timed(stats, 'transform'):
+                    if verdict and verdict['box']:
+                        cropped = loaded.crop(verdict['box'])
+                        if loaded is not img: loaded.close()
+                        loaded = cropped
+                    layout = page_layout(loaded.width, loaded.height, options, verdict)
+                    mode = options['mode'] if not verdict or verdict['spread'] else 'none'
+                    # Zero-copy layouts are applied by the PDF writer instead
+                    pages = optimize_image(loaded, mode='none' if options['geometry'] else mode)
+            finally:
+                if loaded is not img: loaded.close()
+            if options['color_detection']:
+                with timed(stats, 'transform'):
+                    pages = [reduce_colors(page, img.format) for page in pages]
+            return pages, img.format, scale, layout
+
+def choose_quality(sources, options):
+    """Binary-searches the highest JPEG quality whose estimated document size fits Target_Size_MB.
+
+    The estimate extrapolates the encoded size of a few evenly spaced sample pages.
+    """
+    target = SETTINGS['Target_Size_MB'] * 1024 * 1024
+    step = max(1, len(sources) // TARGET_SAMPLE_PAGES)
+    sample = sources[::step][:TARGET_SAMPLE_PAGES]
+    images = []
+    for name, source, *_ in sample:
+        try:
+            pages, source_format, scale, _ = load_pages(source, dict(options, passthrough=False))
+            images.extend((fit_to_max_dimension(page, options, scale)[0], source_format) for page in pages)
+        except Exception as e:
+            logging.error(f"Error {name}: {e}")
+    if not images: return options['quality']
+
+    pool = get_page_pool()
+    def estimate(quality):
+        sample_options = dict(options, quality=quality)
+        sizes = pool.map(lambda entry: len(encode_image(entry[0], sample_options, source_format=entry[1]).data), images)
+        return sum(sizes) / len(sample) * len(sources)
+
+    try:
+        low, high = TARGET_MIN_QUALITY, options['quality']
+        if estimate(high) <= target: return high
+        best = low
+        while low <= high:
+            middle = (low + high) // 2
+            if estimate(middle) <= target:
+                best, low = middle, middle + 1
+            else:
+                high = middle - 1
+        return best
+    finally:
+        for img, _ in images: img.close()
+
+# --- Output Files ---
+# PDFs are written in chunks of this size, each under the output device's writer limit
+WRITE_BUFFER = 4 * 1024 * 1024
+WRITER_GATES = {}
+WRITER_GATES_LOCK = threading.Lock()
+# While a process pool runs, all processes share these; devices map onto them by st_dev
+SHARED_WRITER_GATES = None
+SHARED_WRITER_GATE_SLOTS = 16
+
+def writer_gate(path):
+    """Semaphore limiting concurrent writes to the device holding path (Writers_Per_Device, 0 = no limit)."""
+    limit = SETTINGS['Writers_Per_Device']
+    if limit <= 0: return contextlib.nullcontext()
+    try:
+        device = os.stat(path).st_dev
+    except OSError:
+        device = None
+    if SHARED_WRITER_GATES is not None:
+        # Two devices may land on one slot; that only makes the limit stricter
+        return SHARED_WRITER_GATES[(device or 0) % len(SHARED_WRITER_GATES)]
+    with WRITER_GATES_LOCK:
+        key = (device, limit)
+        if key not in WRITER_GATES: WRITER_GATES[key] = threading.Semaphore(limit)
+        return WRITER_GATES[key]
+
+class ChunkedOutput:
+    """Write-behind buffer for one output file. Small writes are gathered into WRITE_BUFFER
+    sized chunks and every chunk goes to disk under the device's writer gate, so many documents
+    encoding in parallel turn into a few large sequential writes instead of seek thrash."""
+
+    def __init__(self, f, gate):
+        self.f = f
+        self.gate = gate
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        self.position += len(data)
+        if len(data) >= WRITE_BUFFER:
+            # Big image streams go out directly, without a copy into the buffer
+            self.flush()
+            with self.gate: self.write_all(data)
+            return
+        self.buffer += data
+        if len(self.buffer) >= WRITE_BUFFER: self.flush()
+
+    def write_all(self, data):
+        # The file is unbuffered, and a raw write may be short (network shares, signals)
+        offset = 0
+        with memoryview(data) as view:
+            while offset < len(view):
+                written = self.f.write(view[offset:])
+                if written is None: raise BlockingIOError("Output file is non-blocking")
+                offset += written
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        if not self.buffer: return
+        with self.gate: self.write_all(self.buffer)
+        self.buffer.clear()
+
+    def sync(self):
+        self.flush()
+        with self.gate: os.fsync(self.f.fileno())
+
+def validate_pdf(path, pages=None):
+    """Quick structural check of a PDF written by PdfWriter: header, xref offset, trailer and page count."""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            if not f.read(8).startswith(b'%PDF-'): return False
+            f.seek(max(0, size - 1024))
+            match = re.search(rb'startxref\s+(\d+)\s+%%EOF\s*$', f.read())
+            if not match or int(match.group(1)) >= size: return False
+            xref_offset = int(match.group(1))
+            f.seek(xref_offset)
+            header = f.readline() + f.readline()
+            if not re.match(rb'xref\s+0 \d+\s', header): return False
+            if pages is None: return True
+            # Entry 2 of the xref table is the page tree
+            f.seek(xref_offset + len(header) + 2 * 20)
+            pages_offset = int(f.read(10))
+            f.seek(pages_offset)
+            tree = f.read(xref_offset - pages_offset)
+    except (OSError, ValueError) as e:
+        logging.error(f"Cannot validate {path}: {e}")
+        return False
+    match = re.search(rb'/Type /Pages .*?/Count (\d+)', tree, re.DOTALL)
+    return bool(match) and int(match.group(1)) == pages
+
+def process_images_to_pdf(pages, pdf_path, title, stats=None):
+    """Streams pages from any iterable into pdf_path, holding at most one page in memory.
+
+    The PDF is written to a temporary file, synced and renamed into place, so pdf_path only ever
+    holds a complete document, and an earlier PDF there survives an aborted run.
+    """
+    written = 0
+    tmp_path = pdf_path + '.tmp'
     try:
         os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
-        base_image = image_list[0]
-        other_images = image_list[1:]
-        # Enforce Lossless Quality
-        base_image.save(
-            pdf_path, "PDF", resolution=100.0, save_all=True, append_images=other_images,
-            quality=100, subsampling=0, title=title, producer="Image2PDF Script"
-        )
-        return True
+        with open(tmp_path, 'wb', buffering=0) as f:
+            out = ChunkedOutput(f, writer_gate(os.path.dirname(pdf_path)))
+            writer = PdfWriter(out, title=title)
+            for page in pages:
+                try:
+                    if not isinstance(page, PdfImage):
+                        with timed(stats, 'encode'): page = encode_image(page)
+                    with timed(stats, 'write'): written += writer.add_page(page)
+                finally:
+                    if hasattr(page, 'close'): page.close()
+                del page
+            if written and not ABORT_REQUESTED:
+                with timed(stats, 'write'):
+                    writer.close()
+                    out.sync()
+                if stats:
+                    stats.pages = written
+                    stats.bytes_written = out.tell()
+                    stats.add(duplicates=writer.shared)
+        if written and not ABORT_REQUESTED:
+            os.replace(tmp_path, pdf_path)
+            return True
     except Exception as e:
         logging.error(f"Error saving PDF {pdf_path}: {e}")
-        return False
-    finally:
-        for img in image_list:
-            if hasattr(img, 'close'): img.close()
+    # Never leave an empty or half-written PDF behind
+    try: os.remove(tmp_path)
+    except OSError: pass
+    return False
 
 def get_pdf_path(original_path, source_base_path=None):
     filename = f"{os.path.splitext(os.path.basename(original_path))[0]}.pdf"
     custom_out = SETTINGS.get('Output_Path', '').strip()
     if custom_out and os.path.exists(custom_out):
+        if source_base_path:
+            # Mirror nested library trees so equally named volumes do not collide
+            relative_dir = os.path.relpath(os.path.dirname(original_path), source_base_path)
+            if relative_dir != os.curdir: return os.path.join(custom_out, relative_dir, filename)
         return os.path.join(custom_out, filename)
     return os.path.join(os.path.dirname(original_path), filename)
 
-def process_folder(folder_path, pdf_path, progress_callback=None):
-    if ABORT_REQUESTED: return False
-    try:
-        files = os.listdir(folder_path)
-        image_files = [f for f in files if os.path.splitext(f.lower())[1] in SETTINGS['Image_Extensions']]
-        if not image_files: return False
+# --- Page Cache ---
+# Bump when the encoder output or the entry layout changes, to ignore older entries
+CACHE_VERSION = 3
+PAGE_CACHE = None
+PAGE_CACHE_LOCK = threading.Lock()
 
-        image_files.sort(key=natural_sort_key)
-        images = []
-        
-        for i, filename in enumerate(image_files):
-            if ABORT_REQUESTED: return False
+class PageCache:
+    """On-disk cache of encoded output pages and image header info, bounded in size with LRU eviction.
+
+    Entries are plain files named by a hash of the source identity (file path, size and mtime, or
+    archive path, member name and CRC) plus, for pages, the encoding options, so repeat exports of
+    a source skip reading and decoding it. Hits refresh the file mtime, which is the eviction order.
+    Every write is an atomic rename, so the process backend's workers can share the directory.
+    """
+
+    def __init__(self, path, limit):
+        self.path = path
+        self.limit = limit
+        self.added = 0
+        self.lock = threading.Lock()
+
+    def entry_path(self, key, suffix):
+        digest = hashlib.blake2b(json.dumps([CACHE_VERSION, key], sort_keys=True, default=str).encode(),
+                                 digest_size=16).hexdigest()
+        return os.path.join(self.path, digest[:2], digest + suffix)
+
+    def read(self, path):
+        try:
+            with open(path, 'rb') as f: data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def write(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f: f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.error(f"Cache write error {path}: {e}")
+            try: os.remove(tmp_path)
+            except OSError: pass
+            return
+        with self.lock:
+            self.added += len(data)
+            # Trimming lists the whole cache, so only do it after every tenth of the budget written
+            if self.added < self.limit // 10: return
+            self.added = 0
+        self.trim()
+
+    def trim(self):
+        """Deletes the least recently used entries until the cache fits its limit."""
+        entries = []
+        try:
+            for shard in os.scandir(self.path):
+                if not shard.is_dir(): continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.tmp'): continue
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        except OSError as e:
+            logging.error(f"Cache trim error {self.path}: {e}")
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.limit: break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def get_info(self, identity):
+        data = self.read(self.entry_path(identity, '.json'))
+        return json.loads(data) if data else None
+
+    def put_info(self, identity, info):
+        self.write(self.entry_path(identity, '.json'), json.dumps(info).encode())
+
+    def page_key(self, identity, options):
+        return [identity, {k: v for k, v in options.items() if k != 'stats'}]
+
+    def has_pages(self, identity, options):
+        return os.path.exists(self.entry_path(self.page_key(identity, options), '.pages'))
+
+    def get_pages(self, identity, options):
+        data = self.read(self.entry_path(self.page_key(identity, options), '.pages'))
+        if not data: return None
+        try:
+            header_size, = struct.unpack_from('>I', data)
+            pos = 4 + header_size
+            pages = []
+            for fields in json.loads(data[4:pos]):
+                size = fields.pop('size')
+                pages.append(PdfImage(data[pos:pos + size], **fields))
+                pos += size
+            return pages
+        except (ValueError, TypeError, struct.error):
+            return None
+
+    def put_pages(self, identity, options, pages):
+        header = json.dumps([{'width': p.width, 'height': p.height, 'colorspace': p.colorspace, 'bpc': p.bpc,
+                              'filter': p.filter, 'dpi': p.dpi, 'decode_parms': p.decode_parms,
+                              'layout': p.layout, 'size': len(p.data)} for p in pages]).encode()
+        self.write(self.entry_path(self.page_key(identity, options), '.pages'),
+                   b''.join([struct.pack('>I', len(header)), header] + [p.data for p in pages]))
+
+def get_page_cache():
+    """The page cache for the current settings, or None while Cache_Size_MB is 0."""
+    global PAGE_CACHE
+    if SETTINGS['Cache_Size_MB'] <= 0: return None
+    path = SETTINGS['Cache_Path'] or CACHE_DIR
+    limit = SETTINGS['Cache_Size_MB'] * 1024 * 1024
+    with PAGE_CACHE_LOCK:
+        if PAGE_CACHE is None or (PAGE_CACHE.path, PAGE_CACHE.limit) != (path, limit):
+            PAGE_CACHE = PageCache(path, limit)
+        return PAGE_CACHE
+
+# --- Page Planning ---
+def read_header(source):
+    """Header facts (see image_info) of one source image without decoding it; None if that is not cheap."""
+    if isinstance(source, bytes): fp = io.BytesIO(source)
+    elif isinstance(source, str): fp = open(source, 'rb')
+    else: fp = source(header=True)
+    if fp is None: return None
+    with fp, Image.open(fp) as img:
+        return image_info(img)
+
+def page_sizes(info, mode):
+    """The (width, height) of each output page optimize_image makes from an image with these header facts."""
+    width, height = info['width'], info['height']
+    if width > height:
+        if mode == 'split': return [(width - width // 2, height), (width // 2, height)]
+        if mode == 'rotate': return [(height, width)]
+        if mode == 'letterbox': return [(width, int(width * 1.3))]
+    return [(width, height)]
+
+def plan_document(sources, options):
+    """Header-only pass over a document's (name, source, identity) entries, before any decoding.
+
+    Drops images whose header cannot be read, logs multi-frame images (only their first frame
+    is converted), and returns (name, source, identity, sizes, dpi_scale)
+    entries: sizes lists the output pages (see page_sizes), or is None if the header was not read.
+    With Normalize_Page_Size, dpi_scale gives every page the document's median page height.
+    """
+    cache = get_page_cache()
+
+    def plan(entry):
+        name, source, identity = entry
+        info = cache.get_info(identity) if cache and identity else None
+        if info is None:
             try:
-                with Image.open(os.path.join(folder_path, filename)) as img:
-                    processed_imgs = optimize_image(img, mode=SETTINGS['Landscape_Mode'])
-                    images.extend(processed_imgs)
+                info = read_header(source)
             except Exception as e:
-                logging.error(f"Error {filename}: {e}")
-            if progress_callback: progress_callback(i + 1, len(image_files))
+                logging.error(f"Skipping unreadable image {name}: {e}")
+                return None
+            if info and cache and identity: cache.put_info(identity, info)
+        if info and info['format'] == 'TIFF' and info.get('frames', 1) > 1:
+            # Only the first page of a multi-page TIFF becomes a page (animations are not pages)
+            logging.error(f"Only the first of {info['frames']} frames is converted: {name}")
+        return entry, page_sizes(info, options['mode']) if info else None
+
+    pool_map = map if SETTINGS['Profile_Items'] else get_page_pool().map
+    planned = [p for p in pool_map(plan, sources) if p]
+
+    target = None
+    if SETTINGS['Normalize_Page_Size']:
+        heights = sorted(height for _, sizes in planned if sizes for _, height in sizes)
+        if heights: target = heights[len(heights) // 2]
+    return [(*entry, sizes, sizes[0][1] / target if target and sizes else 1.0) for entry, sizes in planned]
+
+# --- Page Pipeline ---
+# One pool shared by every document in this process decodes, transforms and
+# encodes pages, so a single huge archive still uses every core. Pillow
+# releases the GIL while decoding and encoding.
+PAGE_POOL = None
+PAGE_POOL_LOCK = threading.Lock()
+
+def page_worker_count():
+    return SETTINGS['Page_Workers'] if SETTINGS['Page_Workers'] > 0 else (os.cpu_count() or 1)
+
+def get_page_pool():
+    global PAGE_POOL
+    with PAGE_POOL_LOCK:
+        if PAGE_POOL is None:
+            PAGE_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=page_worker_count(), thread_name_prefix='page')
+        return PAGE_POOL
+
+def ordered_map(fn, items, window):
+    """Maps fn over items on the page pool, yielding results in input order with at most `window` in flight."""
+    pool = get_page_pool()
+    pending = collections.deque()
+    try:
+        for item in items:
+            if ABORT_REQUESTED: return
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            if ABORT_REQUESTED: return
+            yield pending.popleft().result()
+    finally:
+        for future in pending: future.cancel()
+
+# --- Duplicate Pages ---
+# Repeated images are found twice over: archive members whose stored CRC and size repeat
+# in a document are decoded and encoded once (PageDeduplicator), and the PDF writer stores
+# identical encoded streams once. The junk index flags or skips images by raw-content hash
+# across documents and runs.
+JUNK_INDEX = None
+
+class PageDeduplicator:
+    """Prepares each source image that repeats within one document once; repeats reuse its pages.
+
+    Keys are content hashes known before reading (an archive member's CRC and size). Pages are
+    held only until the last repeat of their key has taken them.
+    """
+
+    def __init__(self, keys):
+        self.lock = threading.Lock()
+        self.remaining = {key: n for key, n in collections.Counter(k for k in keys if k).items() if n > 1}
+        self.results = {}
+
+    def prepare(self, key, prepare):
+        with self.lock:
+            if key not in self.remaining: return prepare()
+            self.remaining[key] -= 1
+            future = self.results.get(key)
+            owner = future is None
+            if owner: future = self.results[key] = concurrent.futures.Future()
+            if not self.remaining[key]: del self.results[key]
+        # The first occurrence was handed to the page pool earlier, so it is already running
+        if not owner: return future.result()
+        try:
+            pages = prepare()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(pages)
+        return pages
+
+def content_key(identity):
+    """Repeat key of an archive member: its CRC and size, as stored in the archive."""
+    return tuple(identity[2:]) if identity and len(identity) == 4 else None
+
+def content_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class JunkIndex:
+    """Raw-content hashes of images known to be junk (credit pages, ads), kept in a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.hashes = json.load(f).get('hashes', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error(f"Could not read junk index {path}: {e}")
+
+    def __contains__(self, digest):
+        return digest in self.hashes
+
+    def add(self, data, name):
+        digest = content_digest(data)
+        added = digest not in self.hashes
+        self.hashes.setdefault(digest, name)
+        return added
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'hashes': self.hashes}, f, indent=1)
+        os.replace(tmp, self.path)
+
+def get_junk_index():
+    """The Junk_Index of this process, or None when it is off."""
+    global JUNK_INDEX
+    path = SETTINGS['Junk_Index']
+    if not path: return None
+    with PAGE_CACHE_LOCK:
+        if JUNK_INDEX is None or JUNK_INDEX.path != path:
+            JUNK_INDEX = JunkIndex(path)
+        return JUNK_INDEX
+
+def mark_junk(paths, index):
+    """Adds every image under paths (image files, folders, archives) to index; returns how many were new."""
+    def images():
+        for path in paths:
+            ext = os.path.splitext(path.lower())[1]
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for name in sorted(files, key=natural_sort_key):
+                        if os.path.splitext(name.lower())[1] in SETTINGS['Image_Extensions']:
+                            yield name, os.path.join(root, name)
+            elif ext in ('.zip', '.cbz') or (ext in ('.rar', '.cbr') and rarfile):
+                archive = zipfile.ZipFile(path) if ext in ('.zip', '.cbz') else rarfile.RarFile(path)
+                with archive:
+                    for info in archive.infolist():
+                        if not info.is_dir() and os.path.splitext(info.filename.lower())[1] in SETTINGS['Image_Extensions']:
+                            yield info.filename, archive.read(info)
+            else:
+                yield os.path.basename(path), path
+
+    added = 0
+    for name, source in images():
+        added += index.add(read_source(source), name)
+    index.save()
+    return added
+
+# --- Read-Ahead ---
+# With Prefetch_Depth set, raw image bytes are read on a separate I/O pool ahead of
+# the decoders, so slow or high-latency storage (NAS, network shares) keeps the
+# page pool busy: read-ahead -> decode/encode (page pool) -> ordered PDF writer.
+IO_POOL = None
+
+class ByteBudget:
+    """Bytes read ahead but not yet decoded; read-ahead pauses while more than the limit is held."""
 
-        if not images: return False
-        success = process_images_to_pdf(images, pdf_path, os.path.basename(folder_path))
-        del images
-        return success
+    def __init__(self, limit):
+        self.limit = limit
+        self.held = 0
+        self.cond = threading.Condition()
+
+    def full(self):
+        with self.cond: return self.held >= self.limit
+
+    def wait(self):
+        with self.cond:
+            while self.held >= self.limit and not ABORT_REQUESTED: self.cond.wait(0.5)
+
+    def add(self, size):
+        with self.cond: self.held += size
+
+    def release(self, size):
+        with self.cond:
+            self.held -= size
+            self.cond.notify_all()
+
+def get_io_pool():
+    global IO_POOL
+    with PAGE_POOL_LOCK:
+        if IO_POOL is None:
+            IO_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=min(SETTINGS['Prefetch_Depth'], 32),
+                                                            thread_name_prefix='read')
+        return IO_POOL
+
+def read_source(source):
+    if isinstance(source, bytes): return source
+    if isinstance(source, str):
+        with open(source, 'rb') as f: return f.read()
+    with source() as fp: return fp.read()
+
+def prefetch(entries, options, budget):
+    """Yields planned entries in order with their source replaced by its bytes, read up to
+    Prefetch_Depth entries and the byte budget ahead. Entries whose pages are already in the
+    page cache, or whose read fails, are passed through unchanged for prepare_pages to handle."""
+    pool = get_io_pool()
+    depth = SETTINGS['Prefetch_Depth']
+    cache = get_page_cache() if SETTINGS['Cache_Pages'] else None
+    stats = options.get('stats')
+
+    def read(entry):
+        name, source, identity = entry[:3]
+        if cache and identity and cache.has_pages(identity, options): return entry
+        try:
+            with timed(stats, 'read'): data = read_source(source)
+        except Exception as e:
+            logging.error(f"Read error {name}: {e}")
+            return entry
+        budget.add(len(data))
+        return (name, data, *entry[2:])
+
+    pending = collections.deque()
+    entries = iter(entries)
+    exhausted = False
+    try:
+        while not ABORT_REQUESTED:
+            while not exhausted and len(pending) < depth and not budget.full():
+                entry = next(entries, None)
+                if entry is None: exhausted = True
+                else: pending.append(pool.submit(read, entry))
+            if pending:
+                yield pending.popleft().result()
+            elif exhausted:
+                return
+            else:
+                # Everything held is being decoded; wait for it to be released
+                budget.wait()
+    finally:
+        for future in pending:
+            if not future.cancel():
+                entry = future.result()
+                if isinstance(entry[1], bytes): budget.release(len(entry[1]))
+
+def place_pages(pages, dpi_scale):
+    """Sets the paper size of encoded pages (see plan_document)."""
+    for page in pages:
+        page.dpi *= dpi_scale
+    return pages
+
+def prepare_pages(name, source, options, identity=None, dpi_scale=1.0):
+    """Loads one source image and encodes its output pages; runs on the page pool.
+
+    With the page cache enabled and an identity for the source, cached pages are returned without
+    reading the source, and freshly encoded ones are stored. dpi_scale resizes the pages on paper
+    (see plan_document) without touching their pixels.
+    """
+    cache = get_page_cache() if identity else None
+    if cache and SETTINGS['Cache_Pages']:
+        cached = cache.get_pages(identity, options)
+        if cached is not None:
+            if options.get('stats'): options['stats'].add(cache_hits=1)
+            return place_pages(cached, dpi_scale)
+    info = {} if cache else None
+    try:
+        pages, source_format, scale, layout = load_pages(source, options, info)
+    except Exception as e:
+        logging.error(f"Error {name}: {e}")
+        return []
+    if info: cache.put_info(identity, info)
+    # Passthrough pages are the source bytes already, caching them saves nothing
+    store = cache and SETTINGS['Cache_Pages'] and not any(isinstance(page, PdfImage) for page in pages)
+    prepared = []
+    for page in pages:
+        if isinstance(page, PdfImage):
+            prepared.append(page)
+            continue
+        try:
+            with timed(options.get('stats'), 'transform'):
+                page, dpi = fit_to_max_dimension(page, options, scale)
+            with timed(options.get('stats'), 'encode'):
+                encoded = encode_image(page, options, dpi, source_format)
+            encoded.layout = layout
+            prepared.append(encoded)
+        except Exception as e:
+            logging.error(f"Error {name}: {e}")
+        finally:
+            page.close()
+    if store and len(prepared) == len(pages): cache.put_pages(identity, options, prepared)
+    return place_pages(prepared, dpi_scale)
+
+def iter_pages(sources, progress_callback=None, stats=None):
+    """Yields the encoded output pages for (name, source, identity) entries, in order, skipping unreadable images.
+
+    identity names the source's content for the page cache, or is None. Progress is reported in
+    output pages, counted up front by plan_document.
+    """
+    options = encoding_options()
+    options['stats'] = stats
+    with timed(stats, 'plan'):
+        sources = plan_document(list(sources), options)
+    if SETTINGS['Target_Size_MB'] > 0 and sources:
+        options['quality'] = choose_quality(sources, options)
+    total = sum(len(entry[3]) if entry[3] else 1 for entry in sources)
+    done = 0
+    budget = None
+    entries = sources
+    if SETTINGS['Prefetch_Depth'] > 0:
+        budget = ByteBudget(max(1, SETTINGS['Prefetch_MB']) * 1024 * 1024)
+        entries = prefetch(sources, options, budget)
+
+    junk = get_junk_index()
+    dedup = PageDeduplicator(content_key(entry[2]) for entry in sources)
+
+    def prepare(entry):
+        name, source, identity, _, dpi_scale = entry
+        try:
+            if junk is not None:
+                # Junk is recognised by raw-content hash, so the bytes are read before the page cache is asked
+                try:
+                    with timed(stats, 'read'): source = read_source(source)
+                except Exception as e:
+                    logging.error(f"Error {name}: {e}")
+                    return []
+                if content_digest(source) in junk:
+                    if stats: stats.add(junk=1)
+                    # Still goes through dedup, so repeats of the key are not held for it
+                    if SETTINGS['Skip_Junk']: return dedup.prepare(content_key(identity), list)
+            return dedup.prepare(content_key(identity),
+                                 lambda: prepare_pages(name, source, options, identity, dpi_scale))
+        finally:
+            # Prefetched bytes leave the read-ahead budget once decoded
+            if budget and isinstance(entry[1], bytes): budget.release(len(entry[1]))
+
+    if SETTINGS['Profile_Items']:
+        # Keep page work on the profiled item thread so it shows up in the profile
+        prepared = (prepare(entry) for entry in entries if not ABORT_REQUESTED)
+    else:
+        prepared = ordered_map(prepare, entries, page_worker_count() * 2)
+    for i, pages in enumerate(prepared):
+        yield from pages
+        if stats: stats.images = i + 1
+        sizes = sources[i][3]
+        done += len(sizes) if sizes else 1
+        if progress_callback: progress_callback(done, total)
+
+def folder_sources(folder_path):
+    """Lists the (name, path, identity) entries of the images in a folder, in natural order."""
+    with os.scandir(folder_path) as it:
+        entries = [e for e in it if os.path.splitext(e.name.lower())[1] in SETTINGS['Image_Extensions']]
+    entries.sort(key=lambda e: natural_sort_key(e.name))
+    cached = get_page_cache() is not None
+    sources = []
+    for e in entries:
+        identity = None
+        if cached:
+            st = e.stat()
+            identity = [e.path, st.st_size, st.st_mtime_ns]
+        sources.append((e.name, e.path, identity))
+    return sources
+
+def process_folder(folder_path, pdf_path, progress_callback=None, stats=None):
+    if ABORT_REQUESTED: return False
+    try:
+        sources = folder_sources(folder_path)
+        if not sources: return False
+        return process_images_to_pdf(iter_pages(sources, progress_callback, stats), pdf_path,
+                                     os.path.basename(folder_path), stats)
     except Exception as e:
         logging.error(f"Folder error {folder_path}: {e}")
         return False
 
-def process_archive(archive_path, pdf_path, progress_callback=None):
-    if ABORT_REQUESTED: return False
+def archive_member_opener(archive, info):
+    """Returns an opener that reads one archive member lazily, on the page pool.
+
+    opener(header=True) returns a stream for reading just the image header, or None where
+    that would cost a full extraction anyway (RAR members).
+    """
+    is_zip = isinstance(info, zipfile.ZipInfo)
+    def opener(header=False):
+        if is_zip and (header or info.compress_type == zipfile.ZIP_STORED):
+            # Stored members are decoded straight from the archive file, without a bytes copy;
+            # deflated ones only inflate as far as the header reader gets
+            return archive.open(info)
+        if header: return None
+        return io.BytesIO(archive.read(info))
+    return opener
+
+@contextlib.contextmanager
+def archive_sources(archive_path):
+    """Opens an archive and yields the (name, opener, identity) entries of its images, in natural
+    order; yields an empty list for archive types that are not enabled."""
     ext = os.path.splitext(archive_path.lower())[1]
-    try:
-        files_data = []
-        if ext in ['.zip', '.cbz']:
-            with zipfile.ZipFile(archive_path, 'r') as zf:
-                names = zf.namelist()
-                valid_names = [n for n in names if os.path.splitext(n.lower())[1] in SETTINGS['Image_Extensions']]
-                valid_names.sort(key=natural_sort_key)
-                for i, name in enumerate(valid_names):
-                    if ABORT_REQUESTED: return False
-                    files_data.append(zf.read(name))
-                    if progress_callback: progress_callback(i, len(valid_names))
-        elif ext in ['.rar', '.cbr'] and SETTINGS['Enable_RAR']:
-            if not rarfile: raise ImportError("rarfile module missing")
-            with rarfile.RarFile(archive_path, 'r') as rf:
-                names = rf.namelist()
-                valid_names = [n for n in names if os.path.splitext(n.lower())[1] in SETTINGS['Image_Extensions']]
-                valid_names.sort(key=natural_sort_key)
-                for i, name in enumerate(valid_names):
-                    if ABORT_REQUESTED: return False
-                    files_data.append(rf.read(name))
-                    if progress_callback: progress_callback(i, len(valid_names))
-
-        images = []
-        for i, data in enumerate(files_data):
-            if ABORT_REQUESTED: return False
-            try:
-                with Image.open(io.BytesIO(data)) as img:
-                    processed_imgs = optimize_image(img, mode=SETTINGS['Landscape_Mode'])
-                    images.extend(processed_imgs)
-            except Exception as e:
-                logging.error(f"Image error in archive: {e}")
-            if progress_callback: progress_callback(i, len(files_data))
+    if ext in ['.zip', '.cbz']:
+        archive = zipfile.ZipFile(archive_path, 'r')
+    elif ext in ['.rar', '.cbr'] and SETTINGS['Enable_RAR']:
+        if not rarfile: raise ImportError("rarfile module missing")
+        archive = rarfile.RarFile(archive_path, 'r')
+    else:
+        yield []
+        return
 
-        if not images: return False
-        success = process_images_to_pdf(images, pdf_path, os.path.basename(archive_path))
-        del images
-        return success
+    with archive:
+        members = [i for i in archive.infolist()
+                   if not i.is_dir() and os.path.splitext(i.filename.lower())[1] in SETTINGS['Image_Extensions']]
+        members.sort(key=lambda i: natural_sort_key(i.filename))
+        # Members are only read once the page pipeline reaches them, so at most
+        # its read-ahead window of compressed data is held in memory.
+        yield [(info.filename, archive_member_opener(archive, info),
+                [archive_path, info.filename, info.CRC, info.file_size]) for info in members]
+
+def process_archive(archive_path, pdf_path, progress_callback=None, stats=None):
+    if ABORT_REQUESTED: return False
+    try:
+        with archive_sources(archive_path) as sources:
+            if not sources: return False
+            return process_images_to_pdf(iter_pages(sources, progress_callback, stats), pdf_path,
+                                         os.path.basename(archive_path), stats)
     except Exception as e:
         logging.error(f"Archive error {archive_path}: {e}")
         return False
 
-def worker_task(item):
-    if ABORT_REQUESTED: return False
+def worker_task(item, progress_callback=None):
+    """Converts one work item; returns its report (see ItemStats.report)."""
+    stats = ItemStats()
+    if ABORT_REQUESTED: return stats.report(item, False)
+    if progress_callback is None and PROGRESS_QUEUE is not None:
+        progress_callback = lambda done, total: PROGRESS_QUEUE.put((item['path'], done, total))
+    profiler = None
     success = False
-    if item['type'] == 'folder':
-        success = process_folder(item['path'], item['pdf_path'])
-        if success and SETTINGS['Delete_Source']: shutil.rmtree(item['path'], ignore_errors=True)
-    elif item['type'] == 'archive':
-        success = process_archive(item['path'], item['pdf_path'])
-        if success and SETTINGS['Delete_Source']: os.remove(item['path'])
-    gc.collect()
-    return success
+    with PROFILE_LOCK if SETTINGS['Profile_Items'] else contextlib.nullcontext():
+        start = time.perf_counter()
+        try:
+            if SETTINGS['Profile_Items']: profiler = start_profiling()
+            if item['type'] == 'folder':
+                success = process_folder(item['path'], item['pdf_path'], progress_callback, stats)
+            elif item['type'] == 'archive':
+                success = process_archive(item['path'], item['pdf_path'], progress_callback, stats)
+            if success and not validate_pdf(item['pdf_path'], stats.pages):
+                logging.error(f"Output failed validation, source kept: {item['pdf_path']}")
+                success = False
+            if success and SETTINGS['Delete_Source']:
+                if item['type'] == 'folder': shutil.rmtree(item['path'], ignore_errors=True)
+                else: os.remove(item['path'])
+        finally:
+            if profiler: save_profile(item, profiler)
+    return stats.report(item, success, time.perf_counter() - start)
+
+# --- Source Scanner ---
+def archive_extensions():
+    return ['.zip', '.cbz', '.rar', '.cbr'] if SETTINGS['Enable_RAR'] else ['.zip', '.cbz']
+
+def scan_sources(source_path, depth=None, stats=None):
+    """Yields work items under source_path as they are found, descending up to `depth` levels (0 = unlimited).
+
+    Directories at the depth limit always become folder items. Above it, a directory becomes a
+    folder item only if it holds images directly, and its subfolders and archives are scanned too.
+    Every directory is visited once, so symlinks back up the tree (or to a folder scanned
+    elsewhere) neither loop nor produce duplicate items. If stats is a dict, it receives each
+    item's os.stat result by path, taken from the directory listing without another call.
+    """
+    if depth is None: depth = SETTINGS['Scan_Depth']
+    archive_exts = archive_extensions()
+    visited = set()
+
+    def first_visit(path, entry=None):
+        try:
+            # DirEntry caches its stat, so the watcher's signatures below cost nothing extra
+            st = entry.stat() if entry else os.stat(path)
+        except OSError:
+            return False
+        if stats is not None: stats[path] = st
+        key = (st.st_dev, st.st_ino)
+        if key in visited: return False
+        visited.add(key)
+        return True
+
+    def make_item(kind, path):
+        return {'type': kind, 'path': path, 'pdf_path': get_pdf_path(path, source_path)}
+
+    def list_dir(path):
+        try:
+            with os.scandir(path) as it: entries = list(it)
+        except OSError as e:
+            logging.error(f"Scan error {path}: {e}")
+            return []
+        entries.sort(key=lambda e: natural_sort_key(e.name))
+        return entries
+
+    def walk(entries, level):
+        for entry in entries:
+            if ABORT_REQUESTED: return
+            try:
+                # DirEntry caches the type from the directory listing, so this costs no stat call
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if not first_visit(entry.path, entry): continue
+                if depth and level >= depth:
+                    yield make_item('folder', entry.path)
+                    continue
+                children = list_dir(entry.path)
+                if any(os.path.splitext(c.name.lower())[1] in SETTINGS['Image_Extensions'] and c.is_file()
+                       for c in children):
+                    yield make_item('folder', entry.path)
+                yield from walk(children, level + 1)
+            elif os.path.splitext(entry.name.lower())[1] in archive_exts:
+                if stats is not None:
+                    try:
+                        stats[entry.path] = entry.stat()
+                    except OSError:
+                        continue
+                yield make_item('archive', entry.path)
+
+    if os.path.isfile(source_path):
+        if os.path.splitext(source_path.lower())[1] in archive_exts:
+            yield {'type': 'archive', 'path': source_path, 'pdf_path': get_pdf_path(source_path)}
+        return
+    first_visit(source_path)
+    yield from walk(list_dir(source_path), 1)
+
+# --- Conversion Manifest ---
+# Settings that change the produced PDF; an item converted with different
+# values is not considered up to date.
+OUTPUT_SETTINGS = ('PDF_Quality', 'Landscape_Mode', 'Image_Extensions', 'JPEG_Passthrough',
+                   'Chroma_Subsampling', 'Max_Dimension', 'Target_Size_MB', 'Color_Detection',
+                   'Normalize_Page_Size', 'Zero_Copy_Layout', 'Skip_Junk', 'Auto_Crop', 'Skip_Blank_Pages',
+                   'Detect_Spreads', 'Analysis_Tolerance')
+
+def output_settings_signature():
+    return {key: sorted(value) if isinstance(value, set) else value
+            for key, value in ((k, SETTINGS[k]) for k in OUTPUT_SETTINGS)}
+
+def source_files(item):
+    """Lists the (path, stat) pairs whose content defines a work item."""
+    if item['type'] == 'archive':
+        return [(item['path'], os.stat(item['path']))]
+    with os.scandir(item['path']) as it:
+        files = [(e.path, e.stat()) for e in it
+                 if e.is_file() and os.path.splitext(e.name.lower())[1] in SETTINGS['Image_Extensions']]
+    files.sort(key=lambda f: natural_sort_key(os.path.basename(f[0])))
+    return files
+
+def source_state(item):
+    files = source_files(item)
+    return {
+        'size': sum(st.st_size for _, st in files),
+        'mtime': max((st.st_mtime_ns for _, st in files), default=0),
+        'count': len(files)
+    }
+
+def source_hash(item):
+    """Fingerprint of a work item's content that reads no image data: the member names, CRCs and
+    sizes in an archive's central directory, or the names, sizes and mtimes of a folder's images."""
+    digest = hashlib.blake2b(digest_size=20)
+    if item['type'] == 'archive':
+        try:
+            with archive_sources(item['path']) as sources:
+                fields = [(name, identity[2], identity[3]) for name, _, identity in sources]
+        except OSError:
+            raise
+        except Exception as e:
+            raise OSError(f"Unreadable archive {item['path']}: {e}") from e
+    else:
+        fields = [(os.path.basename(path), st.st_size, st.st_mtime_ns) for path, st in source_files(item)]
+    for field in fields:
+        digest.update('\0'.join(map(str, field)).encode('utf-8', 'surrogateescape') + b'\n')
+    return digest.hexdigest()
+
+class ConversionManifest:
+    """Tracks converted sources in manifest.json so unchanged items are skipped on later runs."""
+    SAVE_INTERVAL = 5.0
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.settings = output_settings_signature()
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('items', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Ignoring unreadable manifest {path}: {e}")
+
+    @staticmethod
+    def key(item):
+        return os.path.normcase(os.path.abspath(item['path']))
+
+    def is_up_to_date(self, item):
+        entry = self.entries.get(self.key(item))
+        if not entry or entry['pdf_path'] != item['pdf_path'] or not os.path.exists(item['pdf_path']):
+            return False
+        if entry['settings'] != self.settings:
+            return False
+        try:
+            state = source_state(item)
+        except OSError:
+            return False
+        if all(entry[k] == state[k] for k in state):
+            return True
+        # Touched or rewritten archive with the same members: refresh the stat fields only
+        try:
+            same = entry['size'] == state['size'] and entry['count'] == state['count'] and entry['hash'] == source_hash(item)
+        except OSError:
+            return False
+        if same:
+            with self.lock:
+                entry.update(state)
+                self.dirty = True
+            return True
+        return False
+
+    def record(self, item):
+        try:
+            entry = dict(source_state(item), hash=source_hash(item))
+        except OSError:
+            return  # Source deleted after conversion (Delete_Source); nothing to skip next time
+        entry.update(pdf_path=item['pdf_path'], settings=self.settings)
+        with self.lock:
+            self.entries[self.key(item)] = entry
+            self.dirty = True
+        if time.monotonic() - self.last_save > self.SAVE_INTERVAL: self.save()
+
+    def save(self):
+        with self.lock:
+            if not self.dirty: return
+            data = json.dumps({'version': 1, 'items': self.entries})
+            self.dirty = False
+            self.last_save = time.monotonic()
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f: f.write(data)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Could not save manifest {self.path}: {e}")
+
+# --- Pre-flight Check ---
+# With Preflight_Check, items are checked before any of their pages is decoded, on the
+# page pool and so in parallel across items. 'quick' reads archive directories, local
+# headers and each image's first bytes, plus its last bytes where that needs no
+# decompression (for RAR, stored members only); 'full' streams every archive member
+# through its CRC check as well.
+# A JPEG or PNG whose last bytes hold no end marker is read whole and walked segment by
+# segment, since motion photos, MPF images and appended thumbnails put other data there.
+# Broken items are listed in the corrupt-item report and, with Quarantine_Path set,
+# moved out of the library. Anomalies that do not prove damage are reported as warnings.
+PREFLIGHT_HEAD = 16
+PREFLIGHT_TAIL = 4096
+PREFLIGHT_CHUNK = 1024 * 1024
+# In JPEG entropy-coded data, 0xFF is followed by 0x00 (stuffing), a restart marker or fill
+JPEG_MARKER = re.compile(rb'\xff[^\x00\xd0-\xd7\xff]')
+
+def image_kind(head):
+    """The image format the first bytes of a file announce, or None."""
+    if head.startswith(b'\xff\xd8\xff'): return 'JPEG'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'): return 'PNG'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP': return 'WEBP'
+    if head[:2] == b'BM': return 'BMP'
+    if head[:6] in (b'GIF87a', b'GIF89a'): return 'GIF'
+    if head[:4] in (b'II*\x00', b'MM\x00*'): return 'TIFF'
+    return None
+
+def jpeg_end(data):
+    """Offset just past the end-of-image marker of the JPEG in data, or None if data ends first.
+
+    Follows the segment lengths and the entropy-coded scans, so neither an EXIF thumbnail
+    inside the file nor data appended after it is mistaken for the end. Raises ValueError
+    where the structure makes no sense.
+    """
+    i, size = 2, len(data)
+    while i + 1 < size:
+        if data[i] != 0xFF: raise ValueError(f"no marker at offset {i}")
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+        elif marker == 0xD9:
+            return i + 2
+        elif 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            i += 2
+        else:
+            if i + 4 > size: return None
+            i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+            if marker == 0xDA:
+                # Start of scan: the coded data runs to the next real marker
+                match = JPEG_MARKER.search(data, i)
+                if not match: return None
+                i = match.start()
+    return None
+
+def jpeg_complete(data):
+    """Whether JPEG bytes run through to their end-of-image marker; cheap enough for every passthrough page."""
+    if data.rstrip(b'\x00').endswith(b'\xff\xd9'): return True
+    try:
+        return jpeg_end(data) is not None
+    except ValueError:
+        return False
+
+def png_end(data):
+    """Offset just past the IEND chunk of the PNG in data, or None if data ends first."""
+    i = 8
+    while i + 8 <= len(data):
+        kind = data[i + 4:i + 8]
+        i += 12 + int.from_bytes(data[i:i + 4], 'big')
+        if kind == b'IEND': return i if i <= len(data) else None
+    return None
+
+def check_image_bytes(head, tail, size, read_all=None):
+    """What is wrong with an image judged by its first and last bytes and its size, as
+    {'problem': text} or, where the file may well be fine, {'problem': text, 'warning': True};
+    None if nothing is. tail is None where reading it is not cheap. read_all() returns the
+    whole file, for the rare image whose end marker is not among its last bytes."""
+    if not size: return {'problem': "empty file"}
+    kind = image_kind(head)
+    if kind is None: return {'problem': "not an image (unknown magic bytes)"}
+    if kind == 'WEBP' and int.from_bytes(head[4:8], 'little') + 8 > size: return {'problem': "truncated WebP"}
+    if kind == 'BMP' and int.from_bytes(head[2:6], 'little') > size: return {'problem': "truncated BMP"}
+    if tail is None: return None
+    if kind == 'JPEG' and b'\xff\xd9' not in tail or kind == 'PNG' and b'IEND' not in tail:
+        if read_all is None: return {'problem': f"no {kind} end marker near the end of the file", 'warning': True}
+        data = read_all()
+        try:
+            end = jpeg_end(data) if kind == 'JPEG' else png_end(data)
+        except ValueError as e:
+            return {'problem': f"unexpected {kind} structure: {e}", 'warning': True}
+        if end is None: return {'problem': f"truncated {kind} (data ends before the end marker)"}
+        return {'problem': f"{len(data) - end} bytes of other data after the {kind} end marker", 'warning': True}
+    if kind == 'GIF' and not tail.rstrip(b'\x00').endswith(b';'):
+        return {'problem': "no GIF trailer at the end of the file", 'warning': True}
+    return None
+
+def read_through(fp):
+    """Reads fp to the end (archive members check their CRC there); returns its (head, tail) bytes."""
+    head = tail = fp.read(PREFLIGHT_HEAD)
+    while chunk := fp.read(PREFLIGHT_CHUNK):
+        tail = (tail + chunk)[-PREFLIGHT_TAIL:]
+    return head, tail
+
+def check_folder(path):
+    problems = []
+    with os.scandir(path) as it:
+        entries = [e for e in it if os.path.splitext(e.name.lower())[1] in SETTINGS['Image_Extensions'] and e.is_file()]
+    for e in entries:
+        try:
+            size = e.stat().st_size
+            with open(e.path, 'rb') as f:
+                head = tail = f.read(PREFLIGHT_HEAD)
+                if size > PREFLIGHT_HEAD:
+                    f.seek(max(0, size - PREFLIGHT_TAIL))
+                    tail = f.read()
+                def read_all():
+                    f.seek(0)
+                    return f.read()
+                problem = check_image_bytes(head, tail, size, read_all)
+        except OSError as err:
+            problem = {'problem': str(err)}
+        if problem: problems.append({'member': e.name, **problem})
+    return problems
+
+def check_zip(path, full):
+    problems = []
+    size = os.path.getsize(path)
+    try:
+        archive = zipfile.ZipFile(path)
+    except Exception as e:
+        return [{'member': None, 'problem': f"unreadable archive directory: {e}"}]
+    with archive, open(path, 'rb') as raw:
+        for info in archive.infolist():
+            if info.is_dir() or os.path.splitext(info.filename.lower())[1] not in SETTINGS['Image_Extensions']:
+                continue
+            try:
+                # The local header must be where the central directory says, with all member data after it
+                raw.seek(info.header_offset)
+                local = raw.read(30)
+                if len(local) < 30 or local[:4] != b'PK\x03\x04': raise ValueError("bad local header")
+                data_start = info.header_offset + 30 + sum(struct.unpack('<HH', local[26:30]))
+                if data_start + info.compress_size > size: raise ValueError("archive truncated inside this member")
+                read_all = None
+                if full:
+                    with archive.open(info) as f: head, tail = read_through(f)
+                    read_all = lambda: archive.read(info)
+                else:
+                    with archive.open(info) as f: head = f.read(PREFLIGHT_HEAD)
+                    tail = None
+                    if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 1:
+                        raw.seek(data_start + max(0, info.file_size - PREFLIGHT_TAIL))
+                        tail = raw.read(min(info.file_size, PREFLIGHT_TAIL))
+                        def read_all():
+                            raw.seek(data_start)
+                            return raw.read(info.file_size)
+                problem = check_image_bytes(head, tail, info.file_size, read_all)
+            except Exception as e:
+                problem = {'problem': str(e)}
+            if problem: problems.append({'member': info.filename, **problem})
+    return problems
+
+def check_rar(path, full):
+    if not rarfile: return []
+    problems = []
+    try:
+        with rarfile.RarFile(path) as archive:
+            if archive.needs_password(): return [{'member': None, 'problem': "password protected"}]
+            for info in archive.infolist():
+                if info.is_dir() or os.path.splitext(info.filename.lower())[1] not in SETTINGS['Image_Extensions']:
+                    continue
+                read_all = lambda: archive.read(info)
+                try:
+                    if full:
+                        # rarfile checks the member's CRC once it is read to the end
+                        with archive.open(info) as f: head, tail = read_through(f)
+                    elif info.compress_type == rarfile.RAR_M0:
+                        # Stored members are read straight from the archive; others would need unrar
+                        with archive.open(info) as f:
+                            head = tail = f.read(PREFLIGHT_HEAD)
+                            if info.file_size > PREFLIGHT_HEAD:
+                                f.seek(max(0, info.file_size - PREFLIGHT_TAIL))
+                                tail = f.read()
+                    else:
+                        continue
+                    problem = check_image_bytes(head, tail, info.file_size, read_all)
+                except Exception as e:
+                    problem = {'problem': str(e)}
+                if problem: problems.append({'member': info.filename, **problem})
+    except Exception as e:
+        return [{'member': None, 'problem': f"broken archive: {e}"}]
+    return problems
+
+def check_item(item, full=False):
+    """Lists what is wrong with a work item ([] if nothing) without decoding any image."""
+    try:
+        if item['type'] == 'folder': return check_folder(item['path'])
+        if os.path.splitext(item['path'].lower())[1] in ('.rar', '.cbr'): return check_rar(item['path'], full)
+        return check_zip(item['path'], full)
+    except OSError as e:
+        return [{'member': None, 'problem': str(e)}]
+
+def holds_other_items(path):
+    """Whether a folder item contains subfolders or archives, which a scan may list as items of their own."""
+    archive_exts = archive_extensions()
+    try:
+        with os.scandir(path) as it:
+            return any(e.is_dir() or os.path.splitext(e.name.lower())[1] in archive_exts for e in it)
+    except OSError:
+        return True
+
+class Preflight:
+    """Checks work items ahead of conversion; broken ones go to the corrupt-item report and quarantine."""
+
+    def __init__(self):
+        self.full = SETTINGS['Preflight_Check'] == 'full'
+        self.path = SETTINGS['Corrupt_Report_Path'] or CORRUPT_FILE
+        self.checked = {}
+
+    def check(self, item):
+        return item, check_item(item, self.full)
+
+    def filter(self, items, on_corrupt=None):
+        """Yields the items that pass, in order, checking up to a page pool's worth ahead;
+        calls on_corrupt(item) for the others. Items with only warnings pass, and are reported."""
+        for item, problems in ordered_map(self.check, items, page_worker_count() * 2):
+            if not problems:
+                self.checked[item['path']] = None
+                yield item
+                continue
+            entry = {'type': item['type'], 'problems': problems, 'checked': time.strftime('%Y-%m-%d %H:%M:%S')}
+            errors = [p for p in problems if not p.get('warning')]
+            shown = errors or problems
+            more = f" (+{len(problems) - 1} more)" if len(problems) > 1 else ""
+            member = f"{shown[0]['member']}: " if shown[0]['member'] else ""
+            label = "Corrupt item" if errors else "Warning for item"
+            logging.error(f"{label} {item['path']}: {member}{shown[0]['problem']}{more}")
+            self.checked[item['path']] = entry
+            if not errors:
+                yield item
+                continue
+            quarantined = self.quarantine(item)
+            if quarantined: entry['quarantined'] = quarantined
+            if on_corrupt: on_corrupt(item)
+
+    def quarantine(self, item):
+        if not SETTINGS['Quarantine_Path']: return None
+        if item['type'] == 'folder' and holds_other_items(item['path']):
+            # Moving it would take nested volumes, queued or not, out of the library with it
+            logging.error(f"Not quarantining {item['path']}: it contains other folders or archives")
+            return None
+        base = os.path.join(SETTINGS['Quarantine_Path'], os.path.basename(os.path.normpath(item['path'])))
+        stem, ext = (base, '') if item['type'] == 'folder' else os.path.splitext(base)
+        dest, n = base, 1
+        while os.path.exists(dest):
+            n += 1
+            dest = f"{stem} ({n}){ext}"
+        try:
+            os.makedirs(SETTINGS['Quarantine_Path'], exist_ok=True)
+            shutil.move(item['path'], dest)
+            return dest
+        except OSError as e:
+            logging.error(f"Could not quarantine {item['path']}: {e}")
+            return None
+
+    def save(self):
+        """Merges this run into the report: broken items are added, items that now pass are dropped."""
+        if not self.checked: return
+        items = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: items = json.load(f).get('items', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Replacing unreadable corrupt-item report {self.path}: {e}")
+        for path, entry in self.checked.items():
+            if entry: items[path] = entry
+            else: items.pop(path, None)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'items': items}, f, indent=2)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            logging.error(f"Could not write corrupt-item report {self.path}: {e}")
+
+# --- Scheduling ---
+# With Adaptive_Scheduling, the next items of a batch are costed as the scan finds them
+# (archive directory or folder listing, plus the header of the largest image), run
+# largest first within that lookahead window, and admitted only while their estimated
+# memory fits Memory_Budget_MB.
+# Concurrency starts at Thread_Count and follows the machine's free memory and CPU.
+MB = 1024 * 1024
+ITEM_BASE_COST = 32 * MB         # per-item overhead besides decoded pages: buffers, output chunks
+UNKNOWN_RATIO = 10               # decoded / compressed size assumed when no header can be read (RAR)
+DEFAULT_BUDGET_MB = 2048         # where free memory cannot be measured
+ADAPT_INTERVAL = 1.0
+LOW_MEMORY = 0.10                # below this share of RAM free, run one item fewer
+SPARE_MEMORY = 0.25              # above it, and with idle CPU, run one item more
+IDLE_CPU = 0.80
+SCHEDULE_LOOKAHEAD = 8           # items costed and sorted ahead, per possible worker
+
+def memory_mb():
+    """(available, total) physical memory in MB, or (None, None) where the platform cannot tell."""
+    try:
+        with open('/proc/meminfo') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f}
+        return fields['MemAvailable'] / 1024, fields['MemTotal'] / 1024
+    except (OSError, KeyError, ValueError, IndexError):
+        pass
+    try:
+        import ctypes
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong)] + [
+                (name, ctypes.c_ulonglong) for name in (
+                    'ullTotalPhys', 'ullAvailPhys', 'ullTotalPageFile', 'ullAvailPageFile',
+                    'ullTotalVirtual', 'ullAvailVirtual', 'ullAvailExtendedVirtual')]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys / MB, status.ullTotalPhys / MB
+    except Exception:
+        pass
+    return None, None
+
+class CpuMeter:
+    """System-wide CPU use (0..1) between successive sample() calls, or None where unknown."""
+
+    def __init__(self):
+        self.last = self.times()
+
+    @staticmethod
+    def times():
+        """(idle, total) CPU time since boot; I/O wait counts as idle."""
+        try:
+            with open('/proc/stat') as f:
+                values = [int(v) for v in f.readline().split()[1:]]
+            return values[3] + values[4], sum(values)
+        except (OSError, ValueError, IndexError):
+            pass
+        try:
+            import ctypes
+            idle, kernel, user = ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong()
+            if ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)):
+                # Kernel time includes idle time
+                return idle.value, kernel.value + user.value
+        except Exception:
+            pass
+        return None
+
+    def sample(self):
+        now, last = self.times(), self.last
+        self.last = now
+        if not now or not last or now[1] == last[1]: return None
+        return 1 - (now[0] - last[0]) / (now[1] - last[1])
+
+def estimate_cost(item):
+    """(source bytes, estimated peak memory in bytes) of a work item, without decoding anything.
+
+    Peak memory is taken as the decoded size of the item's largest image for every page
+    worker, twice over (decoded and transformed copies), plus the compressed pages the
+    pipeline holds ahead of the writer.
+    """
+    try:
+        if item['type'] == 'folder':
+            with os.scandir(item['path']) as it:
+                files = [(e.stat().st_size, e.path) for e in it
+                         if os.path.splitext(e.name.lower())[1] in SETTINGS['Image_Extensions'] and e.is_file()]
+            largest = max(files)[1] if files else None
+            info = read_header(largest) if largest else None
+            sizes = [size for size, _ in files]
+        else:
+            with archive_sources(item['path']) as sources:
+                sizes = [identity[3] for _, _, identity in sources]
+                largest = max(sources, key=lambda entry: entry[2][3])[1] if sources else None
+                info = read_header(largest) if largest else None
+    except Exception:
+        return 0, ITEM_BASE_COST
+    if not sizes: return 0, ITEM_BASE_COST
+    if info:
+        page = info['width'] * info['height'] * Image.getmodebands(info['mode'])
+    else:
+        page = max(sizes) * UNKNOWN_RATIO
+    window = min(len(sizes), page_worker_count() * 2)
+    memory = ITEM_BASE_COST + min(len(sizes), page_worker_count()) * page * 2 + window * max(sizes)
+    if SETTINGS['Prefetch_Depth'] > 0: memory += min(sum(sizes), SETTINGS['Prefetch_MB'] * MB)
+    return sum(sizes), memory
+
+class AdmissionControl:
+    """Admits work items while their estimated memory fits the budget, and adapts how many run at once.
+
+    Once per ADAPT_INTERVAL the free system memory and CPU use are sampled: when memory runs
+    low one item fewer may run; when every slot is busy, the CPU has idle time and memory is
+    to spare, one more may run, up to the pool's max_workers. An item is always admitted when
+    nothing else runs, so an item larger than the budget still converts, on its own.
+    """
+
+    def __init__(self, pool):
+        self.max_workers = pool.max_workers or pool.limit
+        self.limit = min(pool.limit, self.max_workers)
+        available, _ = memory_mb()
+        budget_mb = SETTINGS['Memory_Budget_MB'] or (available * 0.6 if available else DEFAULT_BUDGET_MB)
+        self.budget = budget_mb * MB
+        self.held = 0
+        self.cpu = CpuMeter()
+        self.sampled = time.monotonic()
+
+    def admits(self, cost, running):
+        if not running: return True
+        return running < self.limit and self.held + cost <= self.budget
+
+    def acquire(self, cost):
+        self.held += cost
+
+    def release(self, cost):
+        self.held -= cost
+
+    def adapt(self, running):
+        now = time.monotonic()
+        if now - self.sampled < ADAPT_INTERVAL: return
+        self.sampled = now
+        available, total = memory_mb()
+        busy = self.cpu.sample()
+        if available is not None and available < total * LOW_MEMORY:
+            self.limit = max(1, self.limit - 1)
+        elif (running >= self.limit and busy is not None and busy < IDLE_CPU
+              and (available is None or available > total * SPARE_MEMORY)):
+            self.limit = min(self.max_workers, self.limit + 1)
+
+# --- Execution Backends ---
+def init_worker_process(settings, abort_event, progress_queue, writer_gates):
+    """Process pool initializer: children get the settings the parent hands them (its own, with
+    Page_Workers divided among the processes) instead of re-reading config.ini."""
+    global PROGRESS_QUEUE, SHARED_WRITER_GATES
+    SETTINGS.clear()
+    SETTINGS.update(settings)
+    PROGRESS_QUEUE = progress_queue
+    SHARED_WRITER_GATES = writer_gates
+    # Ctrl+C is handled by the parent, which forwards it through abort_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    def watch_abort():
+        global ABORT_REQUESTED
+        abort_event.wait()
+        ABORT_REQUESTED = True
+    threading.Thread(target=watch_abort, daemon=True).start()
+
+def drain_progress(progress_queue, on_page_progress):
+    while True:
+        message = progress_queue.get()
+        if message is None: return
+        if on_page_progress: on_page_progress(*message)
+
+class WorkerPool:
+    """The configured executor ('thread' or 'process') plus the page progress channel of process workers.
+
+    run_work_items() makes one per batch; long-running callers (watch mode) keep one warm across batches.
+    """
+
+    def __init__(self):
+        global ABORT_EVENT, SHARED_WRITER_GATES
+        threads = SETTINGS['Thread_Count'] if SETTINGS['Thread_Count'] > 0 else None
+        # Items run at once: the adaptive scheduler starts here and may go up to one per core
+        self.limit = threads or os.cpu_count() or 1
+        self.max_workers = max(self.limit, os.cpu_count() or 1) if SETTINGS['Adaptive_Scheduling'] else threads
+        self.on_page_progress = None
+        self.progress_queue = self.drain = None
+        if SETTINGS['Execution_Backend'] == 'process':
+            if sys.platform == 'win32': self.max_workers = min(self.max_workers or os.cpu_count() or 1, 61)
+            ctx = multiprocessing.get_context('spawn')
+            self.progress_queue = ctx.Queue()
+            ABORT_EVENT = ctx.Event()
+            if ABORT_REQUESTED: ABORT_EVENT.set()
+            # Writers_Per_Device has to hold across all worker processes, not per process
+            if SETTINGS['Writers_Per_Device'] > 0:
+                SHARED_WRITER_GATES = [ctx.Semaphore(SETTINGS['Writers_Per_Device'])
+                                       for _ in range(SHARED_WRITER_GATE_SLOTS)]
+            self.drain = threading.Thread(target=drain_progress, args=(self.progress_queue, self.page_progress),
+                                          daemon=True)
+            self.drain.start()
+            child_settings = dict(SETTINGS)
+            if child_settings['Page_Workers'] <= 0:
+                # Every process has its own page pool; together they should fill the cores, not square them
+                child_settings['Page_Workers'] = max(1, (os.cpu_count() or 1) // self.max_workers)
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=ctx, initializer=init_worker_process,
+                initargs=(child_settings, ABORT_EVENT, self.progress_queue, SHARED_WRITER_GATES))
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def page_progress(self, path, done, total):
+        if self.on_page_progress: self.on_page_progress(path, done, total)
+
+    def submit(self, item, page_callback=None):
+        if self.progress_queue: return self.executor.submit(worker_task, item)
+        return self.executor.submit(worker_task, item, page_callback)
+
+    def close(self):
+        global ABORT_EVENT, SHARED_WRITER_GATES
+        try:
+            self.executor.shutdown()
+        finally:
+            if self.drain:
+                self.progress_queue.put(None)
+                self.drain.join()
+            ABORT_EVENT = None
+            SHARED_WRITER_GATES = None
+
+def run_work_items(work_items, on_item_done=None, on_page_progress=None, parallel=None,
+                   on_item_start=None, on_item_found=None, report=None, pool=None):
+    """Runs worker_task over work_items, sequentially or on the configured backend ('thread' or 'process').
+
+    work_items may be a lazy iterable such as scan_sources(); conversion starts with the first
+    item found, or with Adaptive_Scheduling once the first lookahead window of items is
+    costed (see AdmissionControl). Items already converted with the current settings are reported as done without
+    running (see ConversionManifest), and every success is recorded so interrupted runs resume.
+    A caller-owned WorkerPool is reused and left open. Returns the RunReport, which is also
+    written to Report_Path when that is set.
+    """
+    if parallel is None: parallel = SETTINGS['Parallel_Processing'] or pool is not None
+    manifest = ConversionManifest() if SETTINGS['Incremental'] else None
+    if report is None: report = RunReport()
+
+    preflight = Preflight() if SETTINGS['Preflight_Check'] != 'off' else None
+
+    user_page_progress = on_page_progress
+    def on_page_progress(path, done, total):
+        report.note_progress(path, done)
+        if user_page_progress: user_page_progress(path, done, total)
+
+    def candidates():
+        for item in work_items:
+            if ABORT_REQUESTED: return
+            if on_item_found: on_item_found(item)
+            if manifest and manifest.is_up_to_date(item):
+                report.add_skipped(item)
+                if on_item_done: on_item_done(item, True)
+            else:
+                yield item
+
+    def corrupt(item):
+        report.add(ItemStats().report(item, False))
+        if on_item_done: on_item_done(item, False)
+
+    def schedule():
+        return preflight.filter(candidates(), corrupt) if preflight else candidates()
+
+    def finish(item, record):
+        report.add(record)
+        if record['success'] and manifest: manifest.record(item)
+        if on_item_done: on_item_done(item, record['success'])
+
+    def page_callback(item):
+        return lambda done, total, path=item['path']: on_page_progress(path, done, total)
+
+    try:
+        if not parallel:
+            for item in schedule():
+                if on_item_start: on_item_start(item)
+                finish(item, worker_task(item, page_callback(item)))
+            return report
+
+        owned = pool is None
+        if owned: pool = WorkerPool()
+        pool.on_page_progress = on_page_progress
+
+        # Keep a few items queued per worker; the scanner only runs ahead by that much
+        max_inflight = (pool.max_workers or os.cpu_count() or 1) * 4
+        inflight = {}
+
+        def harvest(futures):
+            for future in futures:
+                item = inflight.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logging.error(f"Worker error {item['path']}: {e}")
+                    record = ItemStats().report(item, False)
+                finish(item, record)
+
+        try:
+            if SETTINGS['Adaptive_Scheduling']:
+                control = AdmissionControl(pool)
+                source = iter(schedule())
+                exhausted = False
+                lookahead = control.max_workers * SCHEDULE_LOOKAHEAD
+                pending = []
+                costs = {}
+                while True:
+                    if ABORT_REQUESTED: pending.clear()
+                    # Only a window of the scan is costed ahead, so conversion starts right away
+                    # and the scanner stays at most `lookahead` items ahead of the workers
+                    new = []
+                    while not exhausted and len(pending) + len(new) < lookahead:
+                        item = next(source, None)
+                        if item is None: exhausted = True
+                        else: new.append(item)
+                    if new:
+                        pending.extend(zip(get_page_pool().map(estimate_cost, new), new))
+                        # Largest first, so no big item is left running alone at the end of the batch
+                        pending.sort(key=lambda p: -p[0][0])
+                    if not pending and not inflight: break
+                    # Smaller items fill in behind one that does not fit the budget yet
+                    i = 0
+                    while i < len(pending) and len(inflight) < control.limit:
+                        (_, cost), item = pending[i]
+                        if not control.admits(cost, len(inflight)):
+                            i += 1
+                            continue
+                        del pending[i]
+                        control.acquire(cost)
+                        future = pool.submit(item, page_callback(item))
+                        inflight[future], costs[future] = item, cost
+                    done = concurrent.futures.wait(inflight, timeout=ADAPT_INTERVAL,
+                                                   return_when=concurrent.futures.FIRST_COMPLETED)[0]
+                    for future in done: control.release(costs.pop(future))
+                    harvest(done)
+                    control.adapt(len(inflight))
+            else:
+                for item in schedule():
+                    inflight[pool.submit(item, page_callback(item))] = item
+                    harvest([f for f in inflight if f.done()])
+                    if len(inflight) >= max_inflight:
+                        harvest(concurrent.futures.wait(inflight, return_when=concurrent.futures.FIRST_COMPLETED)[0])
+            while inflight:
+                harvest(concurrent.futures.wait(inflight, return_when=concurrent.futures.FIRST_COMPLETED)[0])
+        finally:
+            pool.on_page_progress = None
+            if owned: pool.close()
+    finally:
+        if manifest: manifest.save()
+        if preflight: preflight.save()
+        if SETTINGS['Report_Path']: report.write(SETTINGS['Report_Path'])
+    return report
+
+# --- Merge Mode ---
+# Merge mode streams the pages of many items, in order, into one PDF (an omnibus) with an
+# outline entry per item, optionally split into parts by page count or size. Pages go
+# straight from the page pipeline to the writer, so only the xref entries grow with the
+# page count, and no intermediate per-item PDFs are written and read back.
+def merge_part_path(pdf_path, part):
+    stem, ext = os.path.splitext(pdf_path)
+    return f"{stem} - Part {part}{ext}"
+
+def item_title(item):
+    name = os.path.basename(os.path.normpath(item['path']))
+    return os.path.splitext(name)[0] if item['type'] == 'archive' else name
+
+class MergedPdf:
+    """The omnibus being written; a new part starts once Merge_Max_Pages or Merge_Max_MB would be exceeded.
+
+    Parts are only named "<name> - Part N.pdf" once a second part is needed, so an unsplit
+    omnibus is just pdf_path. Every part is written to a .tmp file and validated before it is
+    renamed into place, like single-item PDFs.
+    """
+
+    def __init__(self, pdf_path, title):
+        self.pdf_path = pdf_path
+        self.title = title
+        self.parts = []
+        self.part = 0
+        self.file = self.out = self.writer = None
+        self.bookmark = None
+        self.marked = True
+        self.max_pages = SETTINGS['Merge_Max_Pages']
+        self.max_bytes = int(SETTINGS['Merge_Max_MB'] * 1024 * 1024)
+
+    def tmp_path(self):
+        return f"{self.pdf_path}.part{self.part}.tmp"
+
+    def start_item(self, title):
+        self.bookmark = title
+        self.marked = False
+
+    def add_page(self, page, stats=None):
+        if self.writer and self.writer.page_ids and (
+                (self.max_pages and len(self.writer.page_ids) >= self.max_pages)
+                or (self.max_bytes and self.out.tell() + len(page.data) > self.max_bytes)):
+            self.finish_part(merge_part_path(self.pdf_path, self.part))
+        if self.writer is None:
+            self.part += 1
+            os.makedirs(os.path.dirname(os.path.abspath(self.pdf_path)), exist_ok=True)
+            self.file = open(self.tmp_path(), 'wb', buffering=0)
+            self.out = ChunkedOutput(self.file, writer_gate(os.path.dirname(os.path.abspath(self.pdf_path))))
+            self.writer = PdfWriter(self.out, title=self.title if self.part == 1 else f"{self.title} ({self.part})")
+            # An item running over into the next part gets a bookmark there too
+            self.marked = False
+        if not self.marked:
+            self.writer.add_bookmark(self.bookmark)
+            self.marked = True
+        shared, start = self.writer.shared, self.out.tell()
+        added = self.writer.add_page(page)
+        if stats:
+            stats.pages += added
+            stats.bytes_written += self.out.tell() - start
+            stats.add(duplicates=self.writer.shared - shared)
+
+    def finish_part(self, path):
+        pages = len(self.writer.page_ids)
+        try:
+            self.writer.close()
+            self.out.sync()
+        finally:
+            self.file.close()
+            self.writer = None
+        if not validate_pdf(self.tmp_path(), pages): raise OSError(f"{path} failed validation")
+        os.replace(self.tmp_path(), path)
+        self.parts.append(path)
+
+    def finish(self):
+        """Completes the last part; returns the paths of all parts."""
+        if self.writer: self.finish_part(self.pdf_path if self.part == 1 else merge_part_path(self.pdf_path, self.part))
+        return self.parts
+
+    def discard(self):
+        if self.writer:
+            self.file.close()
+            self.writer = None
+        try: os.remove(self.tmp_path())
+        except OSError: pass
+
+def merge_items(work_items, pdf_path, on_item_done=None, on_page_progress=None, on_item_found=None):
+    """Streams the pages of work_items, sorted by natural_sort_key of their path, into one PDF.
+
+    Items are converted one after another, each using the page pool. Every item gets an outline
+    entry titled with its folder or archive name. Returns (report, parts): the RunReport, with
+    one record per item, and the paths of the PDF parts written. Sources are only deleted
+    (Delete_Source) once every part has been written and validated.
+    """
+    items = sorted(work_items, key=lambda item: natural_sort_key(item['path']))
+    report = RunReport()
+    if SETTINGS['Preflight_Check'] != 'off':
+        preflight = Preflight()
+        def corrupt(item):
+            if on_item_found: on_item_found(item)
+            report.add(ItemStats().report(item, False))
+            if on_item_done: on_item_done(item, False)
+        items = list(preflight.filter(items, corrupt))
+        preflight.save()
+    merged = MergedPdf(pdf_path, os.path.splitext(os.path.basename(pdf_path))[0])
+    records = []
+    parts = []
+    try:
+        for item in items:
+            if ABORT_REQUESTED: break
+            if on_item_found: on_item_found(item)
+            stats = ItemStats()
+            start = time.perf_counter()
+
+            def progress(done, total, path=item['path']):
+                report.note_progress(path, done)
+                if on_page_progress: on_page_progress(path, done, total)
+
+            try:
+                with contextlib.ExitStack() as stack:
+                    if item['type'] == 'folder': sources = folder_sources(item['path'])
+                    else: sources = stack.enter_context(archive_sources(item['path']))
+                    merged.start_item(item_title(item))
+                    for page in iter_pages(sources, progress, stats):
+                        with timed(stats, 'write'): merged.add_page(page, stats)
+            except Exception as e:
+                logging.error(f"Merge error {item['path']}: {e}")
+            records.append(stats.report(item, stats.pages > 0 and not ABORT_REQUESTED,
+                                        time.perf_counter() - start))
+            if on_item_done: on_item_done(item, records[-1]['success'])
+
+        if ABORT_REQUESTED:
+            merged.discard()
+        else:
+            parts = merged.finish()
+    except Exception as e:
+        logging.error(f"Error saving PDF {pdf_path}: {e}")
+        merged.discard()
+
+    for record in records:
+        record['success'] = record['success'] and bool(parts)
+        report.add(record)
+    if parts and SETTINGS['Delete_Source']:
+        for item, record in zip(items, records):
+            if not record['success']: continue
+            if item['type'] == 'folder': shutil.rmtree(item['path'], ignore_errors=True)
+            else: os.remove(item['path'])
+    if SETTINGS['Report_Path']: report.write(SETTINGS['Report_Path'])
+    return report, parts
+
+# --- Watch Mode ---
+def item_signature(item, st=None):
+    """Cheap change marker for polling: one stat of the archive, or of the folder itself (st if given)."""
+    if st is None: st = os.stat(item['path'])
+    return (st.st_size, st.st_mtime_ns) if item['type'] == 'archive' else st.st_mtime_ns
+
+def is_within(path, folder):
+    path = os.path.abspath(path)
+    return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+class SourceWatcher:
+    """Finds work items under the watched folders that changed and then stayed unchanged for Watch_Settle seconds.
+
+    Uses watchdog (inotify, FSEvents, ReadDirectoryChangesW) when it is installed, so only the items
+    that received events are looked at. Otherwise the folders are polled with scandir every
+    Watch_Interval seconds, comparing one stat per item and re-reading only the changed ones.
+    """
+
+    def __init__(self, roots):
+        self.roots = roots
+        self.items = {}      # path -> (item, signature) for everything under the roots
+        self.pending = {}    # path -> [item, source_state, changed_at] waiting to settle
+        self.changed = set()
+        self.rescan_needed = False
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.observer = self.start_observer()
+        self.scan(time.monotonic(), ConversionManifest() if SETTINGS['Incremental'] else None)
+
+    def start_observer(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+
+        watcher = self
+        output_root = SETTINGS['Output_Path'].strip()
+        output_root = os.path.abspath(output_root) if output_root else None
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Our own reads show up as opened/closed_no_write events
+                if event.event_type not in ('created', 'modified', 'moved', 'deleted', 'closed'): return
+                paths = {os.fsdecode(p) for p in (event.src_path, getattr(event, 'dest_path', '')) if p}
+                # Our own output is never a source
+                paths = {p for p in paths if not p.lower().endswith(('.pdf', '.tmp'))
+                         and not (output_root and is_within(p, output_root))}
+                if not paths: return
+                with watcher.lock: watcher.changed.update(paths)
+                watcher.wake.set()
+
+        observer = Observer()
+        for root in self.roots: observer.schedule(Handler(), root, recursive=True)
+        observer.start()
+        return observer
+
+    def close(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+
+    def mark(self, item, now):
+        if item['path'] not in self.pending: self.pending[item['path']] = [item, None, now]
+
+    def scan(self, now, manifest=None):
+        found = {}
+        stats = {}
+        for root in self.roots:
+            for item in scan_sources(root, stats=stats):
+                try:
+                    found[item['path']] = (item, item_signature(item, stats.get(item['path'])))
+                except OSError:
+                    continue
+        for path, (item, signature) in found.items():
+            known = self.items.get(path)
+            if known and known[1] == signature: continue
+            if manifest and manifest.is_up_to_date(item): continue
+            self.mark(item, now)
+        for path in self.items.keys() - found.keys(): self.pending.pop(path, None)
+        self.items = found
+
+    def owner(self, path):
+        """The known work item containing path, if any."""
+        while path not in self.items:
+            parent = os.path.dirname(path)
+            if parent == path: return None
+            path = parent
+        return self.items[path][0]
+
+    def poll(self):
+        """Returns the items that are ready to convert."""
+        now = time.monotonic()
+        if self.observer:
+            with self.lock: changed, self.changed = self.changed, set()
+            for path in changed:
+                item = self.owner(path)
+                if item: self.mark(item, now)
+                else: self.rescan_needed = True
+        if self.rescan_needed or not self.observer:
+            self.rescan_needed = False
+            self.scan(now)
+
+        ready = []
+        for path, entry in list(self.pending.items()):
+            item, state, changed_at = entry
+            try:
+                current = source_state(item)
+            except OSError:
+                # Removed, or renamed away mid-copy
+                del self.pending[path]
+                self.items.pop(path, None)
+                continue
+            if current != state:
+                entry[1], entry[2] = current, now
+            elif current['count'] and now - changed_at >= SETTINGS['Watch_Settle']:
+                del self.pending[path]
+                # Remember the settled state, so a later rescan does not see the copy as a change
+                try: self.items[path] = (item, item_signature(item))
+                except OSError: self.items.pop(path, None)
+                ready.append(item)
+        ready.sort(key=lambda item: natural_sort_key(item['path']))
+        return ready
+
+def write_status(path, status):
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f: json.dump(status, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.error(f"Could not write status {path}: {e}")
+
+def watch_sources(roots, on_item_done=None, on_batch_done=None):
+    """Watch mode: converts new and changed items under roots in batches until aborted (Ctrl+C).
+
+    Items are converted once they stop changing, every batch reuses one warm WorkerPool, and the
+    service state and running totals are kept in the status file (Status_Path, default status.json).
+    """
+    status_path = SETTINGS['Status_Path'] or STATUS_FILE
+    watcher = SourceWatcher(roots)
+    pool = WorkerPool() if SETTINGS['Parallel_Processing'] else None
+    status = {
+        'pid': os.getpid(), 'state': 'idle', 'roots': roots,
+        'watcher': 'watchdog' if watcher.observer else 'polling',
+        'backend': SETTINGS['Execution_Backend'] if pool else 'sequential',
+        'started': time.time(), 'updated': None, 'pending': 0, 'converting': [],
+        'batches': 0, 'items': 0, 'succeeded': 0, 'failed': 0, 'images': 0, 'pages': 0,
+        'bytes_written': 0, 'last_batch': None,
+    }
+    try:
+        while not ABORT_REQUESTED:
+            batch = watcher.poll()
+            status['pending'] = len(watcher.pending)
+            if batch:
+                status.update(state='converting', converting=[item['path'] for item in batch], updated=time.time())
+                write_status(status_path, status)
+                summary = run_work_items(batch, on_item_done=on_item_done, parallel=pool is not None,
+                                         pool=pool).summary()
+                status['batches'] += 1
+                status['failed'] += summary['items'] - summary['succeeded']
+                for key in ('items', 'succeeded', 'images', 'pages', 'bytes_written'): status[key] += summary[key]
+                status.update(state='idle', converting=[], last_batch=summary)
+                if on_batch_done: on_batch_done(summary)
+            status['updated'] = time.time()
+            write_status(status_path, status)
+            watcher.wake.wait(SETTINGS['Watch_Interval'])
+            watcher.wake.clear()
+    finally:
+        watcher.close()
+        if pool: pool.close()
+        status.update(state='stopped', converting=[], updated=time.time())
+        write_status(status_path, status)
+    return status
 
 # --- UnRAR Check ---
 def check_unrar_status():
@@ -289,320 +2893,215 @@ def check_unrar_status():
         
     return "DOWNLOAD"
 
-def perform_startup_check(root):
-    status = check_unrar_status()
-    if status == "OK":
-        return
+# --- Command Line ---
+# Short spellings for the most used settings; every setting also gets a --kebab-case flag
+CLI_ALIASES = {
+    'PDF_Quality': ['--quality', '-q'],
+    'Thread_Count': ['--threads', '-j'],
+    'Landscape_Mode': ['--mode'],
+    'Output_Path': ['--output', '-o'],
+    'Scan_Depth': ['--depth', '--recursion'],
+    'Execution_Backend': ['--backend'],
+    'Report_Path': ['--report'],
+}
+CLI_CHOICES = {
+    'Landscape_Mode': ['none', 'letterbox', 'split', 'rotate'],
+    'Execution_Backend': ['thread', 'process'],
+    'Chroma_Subsampling': ['auto', *SUBSAMPLING],
+    'Preflight_Check': ['off', 'quick', 'full'],
+}
 
-    if status == "COPY":
-        msg = (
-            "UnRAR.exe Detected in Program Files!\n\n"
-            "To enable RAR/CBR support, please COPY 'UnRAR.exe' from:\n"
-            "C:\\Program Files\\WinRAR\\\n\n"
-            "And PASTE it into this application's folder:\n"
-            f"{APP_DIR}\n\n"
-            "Then restart the application."
-        )
-        messagebox.showinfo("Setup Required", msg, parent=root)
-    
-    elif status == "DOWNLOAD":
-        url = "https://www.win-rar.com/start.html?&L=0"
-        msg = (
-            "WinRAR Not Installed / UnRAR Missing!\n\n"
-            "To support RAR/CBR files, you need WinRAR.\n"
-            "Would you like to open the download page now?"
-        )
-        if messagebox.askyesno("Missing Component", msg, icon="warning", parent=root):
-            webbrowser.open(url)
-
-# --- GUI Class ---
-class ConverterGUI(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        
-        # Run Check
-        # Run Smart Check
-        self.after(500, lambda: perform_startup_check(self))
+def parse_extensions(text):
+    """'jpg, .PNG' -> {'.jpg', '.png'}"""
+    return {('' if e.startswith('.') else '.') + e for e in (e.strip().lower() for e in text.split(',')) if e}
 
-        self.style = ttk.Style(theme=SETTINGS['Theme'])
-        self.title("Image2PDF Professional")
-        self.geometry("700x700")
-        
-        # Ensure icon support if we add one later
-        # try: self.iconbitmap(os.path.join(APP_DIR, 'icon.ico'))
-        # except: pass
-        
-        self.source_path = tk.StringVar()
-        self.output_path = tk.StringVar(value=SETTINGS['Output_Path'])
-        self.status_var = tk.StringVar(value="Ready")
-        self.progress_var = tk.DoubleVar()
-        
-        self.parallel_var = tk.BooleanVar(value=SETTINGS['Parallel_Processing'])
-        self.quality_var = tk.IntVar(value=SETTINGS['PDF_Quality'])
-        self.threads_var = tk.IntVar(value=SETTINGS['Thread_Count'])
-        self.rar_var = tk.BooleanVar(value=SETTINGS['Enable_RAR'])
-        self.landscape_var = tk.StringVar(value=SETTINGS['Landscape_Mode'])
-        self.theme_var = tk.StringVar(value=SETTINGS['Theme'])
-        self.delete_var = tk.BooleanVar(value=SETTINGS['Delete_Source'])
-        
-        self.is_running = False
-        self.setup_ui()
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog='image2pdf',
+        description="Convert image folders and archives to PDF. Without sources the GUI starts. "
+                    "Settings come from config.ini; the flags below override them for this run.")
+    parser.add_argument('sources', nargs='*', help="Folders or archives to convert")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="List what would be converted or skipped as up to date, then exit")
+    parser.add_argument('--progress', choices=['bar', 'json', 'none'], default='bar',
+                        help="bar: progress bar; json: one JSON event per line on stdout; none: summary only")
+    parser.add_argument('--save-settings', action='store_true', help="Also write the overrides to config.ini")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and convert new or changed items under the source folders as they settle")
+    parser.add_argument('--no-notify', dest='notify', action='store_false',
+                        help="No desktop notification when the batch is finished")
+    parser.add_argument('--merge', metavar='PDF',
+                        help="Combine all found items, in natural order, into this one PDF with a bookmark per item")
+    parser.add_argument('--mark-junk', nargs='+', metavar='PATH',
+                        help="Add these images (files, folders or archives) to the junk index, then exit")
 
-    def setup_ui(self):
-        main_frame = ttk.Frame(self, padding=20)
-        main_frame.pack(fill=BOTH, expand=True)
-        
-        ttk.Label(main_frame, text="Image to PDF Converter", font=("Segoe UI", 18, "bold"), bootstyle="primary").pack(pady=(0, 20))
-        
-        # Source
-        src_frame = ttk.Labelframe(main_frame, text="Source Folder/Archive", padding=10, bootstyle="info")
-        src_frame.pack(fill=X, pady=5)
-        ttk.Entry(src_frame, textvariable=self.source_path).pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
-        btn_src = ttk.Button(src_frame, text="Browse", command=self.browse_source, bootstyle="secondary-outline")
-        btn_src.pack(side=LEFT)
-        ToolTip(btn_src, text="Select the folder containing images or subfolders/archives")
-
-        # Output
-        out_frame = ttk.Labelframe(main_frame, text="Output Folder (Optional)", padding=10, bootstyle="info")
-        out_frame.pack(fill=X, pady=5)
-        ttk.Entry(out_frame, textvariable=self.output_path).pack(side=LEFT, fill=X, expand=True, padx=(0, 10))
-        btn_out = ttk.Button(out_frame, text="Browse", command=self.browse_output, bootstyle="secondary-outline")
-        btn_out.pack(side=LEFT)
-        ToolTip(btn_out, text="PDFs will be saved here. Leave empty to save in source folder.")
-        
-        # Config
-        opt_frame = ttk.Labelframe(main_frame, text="Configuration", padding=10, bootstyle="warning")
-        opt_frame.pack(fill=X, pady=10)
-        
-        # Row 1
-        r1 = ttk.Frame(opt_frame); r1.pack(fill=X, pady=5)
-        cb_par = ttk.Checkbutton(r1, text="Parallel Processing", variable=self.parallel_var, bootstyle="round-toggle", command=self.toggle_threads)
-        cb_par.pack(side=LEFT)
-        ToolTip(cb_par, text="Faster conversion using multiple CPU cores")
-        
-        ttk.Label(r1, text="Threads:").pack(side=LEFT, padx=(15, 5))
-        self.spin_threads = ttk.Spinbox(r1, from_=1, to=32, textvariable=self.threads_var, width=5)
-        self.spin_threads.pack(side=LEFT)
-        
-        ttk.Label(r1, text="Theme:").pack(side=LEFT, padx=(20, 5))
-        cb_theme = ttk.Combobox(r1, textvariable=self.theme_var, values=self.style.theme_names(), width=10, state="readonly")
-        cb_theme.pack(side=LEFT)
-        cb_theme.bind("<<ComboboxSelected>>", self.change_theme)
-
-        # Row 2
-        r2 = ttk.Frame(opt_frame); r2.pack(fill=X, pady=5)
-        ttk.Label(r2, text="Quality (1-100):").pack(side=LEFT, padx=(0, 5))
-        sp_qual = ttk.Spinbox(r2, from_=1, to=100, textvariable=self.quality_var, width=5)
-        sp_qual.pack(side=LEFT)
-        ToolTip(sp_qual, text="Set PDF Quality (1-100). 100 is Lossless.")
-        
-        ttk.Label(r2, text="Landscape Mode:").pack(side=LEFT, padx=(20, 5))
-        modes = ['none', 'letterbox', 'split', 'rotate']
-        cb_land = ttk.Combobox(r2, textvariable=self.landscape_var, values=modes, width=10, state="readonly")
-        cb_land.pack(side=LEFT)
-        ToolTip(cb_land, text="None: Keep Original\nLetterbox: Add White Bars\nSplit: Cut for Manga\nRotate: Turn 90 deg")
-        
-        cb_rar = ttk.Checkbutton(r2, text="RAR/CBR Support", variable=self.rar_var, bootstyle="square-toggle")
-        cb_rar.pack(side=LEFT, padx=(20, 0))
-        ToolTip(cb_rar, text="Enable support for .rar and .cbr files. Requires UnRAR.exe.")
-
-        # Row 3 (Delete Safety)
-        r3 = ttk.Frame(opt_frame); r3.pack(fill=X, pady=(10, 5))
-        cb_del = ttk.Checkbutton(r3, text="Delete Source Files After Conversion", variable=self.delete_var, bootstyle="danger-round-toggle")
-        cb_del.pack(side=LEFT)
-        ToolTip(cb_del, text="WARNING: This deletes the original folder/archive after successful PDF creation.")
-
-        btn_box = ttk.Frame(opt_frame); btn_box.pack(fill=X, pady=(10,0))
-        btn_log = ttk.Button(btn_box, text="View Logs", command=self.view_logs, bootstyle="danger-link")
-        btn_log.pack(side=LEFT)
-        ToolTip(btn_log, text="Click to see error logs (e.g. broken zips, missing files).")
-        ttk.Button(btn_box, text="Save Settings", command=self.save_settings, bootstyle="success-outline").pack(side=RIGHT)
-
-        # Progress
-        self.pbar = ttk.Floodgauge(main_frame, variable=self.progress_var, maximum=100, bootstyle="success", mask="{}%")
-        self.pbar.pack(fill=X, pady=20)
-        self.lbl_status = ttk.Label(main_frame, textvariable=self.status_var, font=("Segoe UI", 9))
-        self.lbl_status.pack()
-        
-        # Act
-        act_frame = ttk.Frame(main_frame); act_frame.pack(pady=10)
-        self.btn_run = ttk.Button(act_frame, text="START CONVERSION", command=self.start_conversion, bootstyle="primary-lg", width=20)
-        self.btn_run.pack(side=LEFT, padx=10)
-        ttk.Button(act_frame, text="EXIT", command=self.destroy, bootstyle="secondary", width=10).pack(side=LEFT, padx=10)
-        
-        self.toggle_threads()
+    group = parser.add_argument_group('settings')
+    for key, default in DEFAULT_SETTINGS.items():
+        flags = ['--' + key.lower().replace('_', '-')] + CLI_ALIASES.get(key, [])
+        current = ', '.join(sorted(SETTINGS[key])) if isinstance(default, set) else SETTINGS[key]
+        kwargs = {'dest': key, 'default': None, 'help': f"{key} (now: {current!s})"}
+        if isinstance(default, bool):
+            kwargs['action'] = argparse.BooleanOptionalAction
+        elif isinstance(default, set):
+            kwargs.update(type=parse_extensions, metavar='EXT,...')
+        else:
+            kwargs.update(type=type(default), choices=CLI_CHOICES.get(key),
+                          metavar='PATH' if key.endswith('_Path') else None if key in CLI_CHOICES else 'N'
+                          if isinstance(default, (int, float)) else 'NAME')
+        group.add_argument(*flags, **kwargs)
+    return parser
 
-    def toggle_threads(self):
-        if self.parallel_var.get(): self.spin_threads.configure(state='normal')
-        else: self.spin_threads.configure(state='disabled')
-        
-    def change_theme(self, event):
-        self.style.theme_use(self.theme_var.get())
+def notify(title, message):
+    """Desktop notification, if plyer and a notification service are available."""
+    if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        return  # Headless: plyer would only print D-Bus errors
+    try:
+        from plyer import notification
+        notification.notify(title=title, message=message, app_name='Image2PDF', timeout=5)
+    except Exception:
+        pass
 
-    def browse_source(self):
-        p = filedialog.askdirectory(); 
-        if p: self.source_path.set(p)
-        
-    def browse_output(self):
-        p = filedialog.askdirectory(); 
-        if p: self.output_path.set(p)
-        
-    def viewer_window(self, content):
-        top = ttk.Toplevel(self)
-        top.title("Log Viewer")
-        top.geometry("600x400")
-        st = scrolledtext.ScrolledText(top, width=80, height=20)
-        st.pack(fill=BOTH, expand=True)
-        st.insert(tk.END, content)
-        st.configure(state='disabled')
-
-    def view_logs(self):
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, 'r') as f: content = f.read()
-            if not content: content = "No errors logged."
-        else: content = "Log file not found."
-        self.viewer_window(content)
-        
-    def save_settings(self):
-        SETTINGS.update({
-            'Parallel_Processing': self.parallel_var.get(),
-            'Thread_Count': self.threads_var.get(),
-            'PDF_Quality': self.quality_var.get(),
-            'Enable_RAR': self.rar_var.get(),
-            'Theme': self.theme_var.get(),
-            'Landscape_Mode': self.landscape_var.get(),
-            'Output_Path': self.output_path.get(),
-            'Delete_Source': self.delete_var.get()
-        })
-        save_config(SETTINGS)
-        messagebox.showinfo("Saved", "Settings saved successfully!", parent=self)
-
-    def start_conversion(self):
-        if self.is_running: return
-        path = self.source_path.get()
-        if not path or not os.path.exists(path):
-            messagebox.showerror("Error", "Invalid Source Path")
-            return
-            
-        SETTINGS.update({
-            'Output_Path': self.output_path.get(),
-            'Landscape_Mode': self.landscape_var.get(),
-            'Thread_Count': self.threads_var.get(),
-            'PDF_Quality': self.quality_var.get(),
-            'Delete_Source': self.delete_var.get()
-        })
-        
-        self.is_running = True
-        self.btn_run.configure(state='disabled')
-        self.status_var.set("Scanning...")
-        self.progress_var.set(0)
-        
-        threading.Thread(target=self.run_logic, args=(path,), daemon=True).start()
-
-    def run_logic(self, source_path):
-        global ABORT_REQUESTED; ABORT_REQUESTED = False
-        try:
-            items = os.listdir(source_path)
-            work_items = []
-            for item in items:
-                item_path = os.path.join(source_path, item)
-                ext = os.path.splitext(item.lower())[1]
-                pdf_path = get_pdf_path(item_path)
-                
-                if os.path.isdir(item_path):
-                     work_items.append({'type': 'folder', 'path': item_path, 'pdf_path': pdf_path})
-                elif ext in ['.zip', '.cbz']:
-                     work_items.append({'type': 'archive', 'path': item_path, 'pdf_path': pdf_path})
-                elif ext in ['.rar', '.cbr'] and SETTINGS['Enable_RAR']:
-                     work_items.append({'type': 'archive', 'path': item_path, 'pdf_path': pdf_path})
-            
-            total = len(work_items)
-            if total == 0:
-                self.after(0, lambda: messagebox.showinfo("Info", "No items found!"))
-                self.is_running = False
-                self.after(0, lambda: self.btn_run.configure(state='normal'))
-                return
-            
-            self.status_var.set(f"Found {total} items. Starting...")
-            completed = 0
-            
-            if self.parallel_var.get():
-                max_workers = SETTINGS['Thread_Count'] if SETTINGS['Thread_Count'] > 0 else None
-                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    futures = {executor.submit(worker_task, item): item for item in work_items}
-                    for future in concurrent.futures.as_completed(futures):
-                        completed += 1
-                        progress = (completed / total) * 100
-                        self.after(0, lambda p=progress: self.progress_var.set(p))
-                        self.after(0, lambda c=completed, t=total: self.status_var.set(f"Processed {c}/{t}"))
-            else:
-                 for item in work_items:
-                     if ABORT_REQUESTED: break
-                     self.after(0, lambda n=os.path.basename(item['path']): self.status_var.set(f"Converting {n}"))
-                     worker_task(item)
-                     completed += 1
-                     progress = (completed / total) * 100
-                     self.after(0, lambda p=progress: self.progress_var.set(p))
-
-            self.after(0, lambda: self.show_success(completed))
-            
-        except Exception as e:
-            logging.error(f"GUI Error: {e}")
-            self.after(0, lambda: messagebox.showerror("Error", f"Error: {e}"))
-        finally:
-            self.is_running = False
-            self.after(0, lambda: self.btn_run.configure(state='normal'))
-            self.after(0, lambda: self.status_var.set("Ready"))
-
-    def show_success(self, count):
-        messagebox.showinfo("Done", f"Processed {count} items.")
-        if winsound: winsound.MessageBeep()
-        try:
-            notification.notify(
-                title='Image2PDF Finished',
-                message=f'Successfully converted {count} items.',
-                app_name='Image2PDF',
-                timeout=5
-            )
-        except: pass
-
-def main():
-    if len(sys.argv) > 1:
-        # CLI Mode
-        # Check UnRAR first
-        # Check UnRAR first
+def dry_run(work_items, emit, merge=None):
+    if merge:
+        items = sorted(work_items, key=lambda item: natural_sort_key(item['path']))
+        for item in items:
+            emit({'event': 'plan', 'action': 'merge', **item, 'pdf_path': merge},
+                 f"{'merge':<8} {item['type']:<8} {item['path']} -> {merge}")
+        emit({'event': 'summary', 'merge': len(items)}, f"{len(items)} items to merge into {merge}")
+        return 0
+    manifest = ConversionManifest() if SETTINGS['Incremental'] else None
+    counts = collections.Counter()
+    for item in work_items:
+        action = 'skip' if manifest and manifest.is_up_to_date(item) else 'convert'
+        counts[action] += 1
+        emit({'event': 'plan', 'action': action, **item},
+             f"{action:<8} {item['type']:<8} {item['path']} -> {item['pdf_path']}")
+    emit({'event': 'summary', 'convert': counts['convert'], 'skip': counts['skip']},
+         f"{counts['convert']} to convert, {counts['skip']} up to date")
+    return 0
+
+def run_cli(sources, progress='bar', dry=False, watch=False, merge=None, notify_done=True):
+    """Headless conversion of every source, or of all of them into the one PDF merge; returns the process exit code.
+    notify_done shows a desktop notification when the batch is finished (not with JSON progress)."""
+    missing = [s for s in sources if not os.path.exists(s)]
+    if missing:
+        print(f"Path not found: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    if SETTINGS['Enable_RAR']:
         unrar_status = check_unrar_status()
         if unrar_status != "OK":
-             print(f"WARNING: UnRAR status is {unrar_status}. RAR/CBR files may be skipped.\n(Check GUI mode for setup instructions)")
-             
-        print("CLI Mode Active.")
-        source_path = sys.argv[1].strip('"').strip("'")
-        if not os.path.exists(source_path): print("Path not found"); return
-        
-        items = os.listdir(source_path)
-        work_items = []
-        for item in items:
-            item_path = os.path.join(source_path, item)
-            ext = os.path.splitext(item.lower())[1]
-            pdf_path = get_pdf_path(item_path)
-            if os.path.isdir(item_path): work_items.append({'type': 'folder', 'path': item_path, 'pdf_path': pdf_path})
-            elif ext in ['.zip', '.cbz']: work_items.append({'type': 'archive', 'path': item_path, 'pdf_path': pdf_path})
-            elif ext in ['.rar', '.cbr'] and SETTINGS['Enable_RAR']: work_items.append({'type': 'archive', 'path': item_path, 'pdf_path': pdf_path})
-        
-        if SETTINGS['Parallel_Processing']:
-             with tqdm(total=len(work_items)) as pbar:
-                 with concurrent.futures.ThreadPoolExecutor(max_workers=SETTINGS['Thread_Count'] or None) as ex:
-                     futures = [ex.submit(worker_task, i) for i in work_items]
-                     for f in concurrent.futures.as_completed(futures): pbar.update(1)
-        else:
-            for i in tqdm(work_items): worker_task(i)
-        
-        try: notification.notify(title="Image2PDF", message="Batch Complete")
-        except: pass
+            print(f"WARNING: UnRAR status is {unrar_status}. RAR/CBR files may be skipped.\n"
+                  "(Check GUI mode for setup instructions)", file=sys.stderr)
+
+    lock = threading.Lock()
+    def emit(event, text=None):
+        with lock:
+            if progress == 'json': print(json.dumps(event, default=str), flush=True)
+            elif text is not None: print(text)
+
+    work_items = (item for source in sources for item in scan_sources(source))
+    if dry: return dry_run(work_items, emit, merge)
+    if SETTINGS['Output_Path']: os.makedirs(SETTINGS['Output_Path'], exist_ok=True)
+
+    if merge and watch:
+        print("Watch mode cannot merge.", file=sys.stderr)
+        return 2
+    parts = None
+    def run(work_items, **callbacks):
+        nonlocal parts
+        if not merge: return run_work_items(work_items, **callbacks)
+        report, parts = merge_items(work_items, merge, **callbacks)
+        return report
+
+    if watch:
+        folders = [s for s in sources if os.path.isdir(s)]
+        if len(folders) != len(sources):
+            print("Watch mode needs folders, not archives.", file=sys.stderr)
+            return 2
+        print(f"Watching {', '.join(folders)} (Ctrl+C to stop)", file=sys.stderr)
+        status = watch_sources(
+            folders,
+            on_item_done=lambda item, success: emit(
+                {'event': 'done', 'path': item['path'], 'success': success},
+                f"{'OK' if success else 'FAILED':<7} {item['path']}"),
+            on_batch_done=lambda s: emit(
+                {'event': 'batch', **s},
+                f"Batch: {s['succeeded']}/{s['items']} items OK, {s['pages']} pages, {s['images_per_s']:.1f} images/s"))
+        return 0 if not status['failed'] else 1
+
+    callbacks = {}
+    if progress == 'json':
+        callbacks = {
+            'on_item_found': lambda item: emit({'event': 'found', **item}),
+            'on_page_progress': lambda path, done, count: emit(
+                {'event': 'page', 'path': path, 'done': done, 'total': count}),
+            'on_item_done': lambda item, success: emit({'event': 'done', 'path': item['path'], 'success': success}),
+        }
+        report = run(work_items, **callbacks)
+    elif progress == 'bar':
+        from tqdm import tqdm
+        with tqdm(total=0) as pbar:
+            def on_item_found(item):
+                pbar.total += 1
+                pbar.refresh()
+
+            report = run(
+                work_items,
+                on_item_done=lambda item, success: pbar.update(1),
+                on_page_progress=lambda path, done, count: pbar.set_postfix_str(
+                    f"{os.path.basename(path)} {done}/{count}", refresh=False),
+                on_item_found=on_item_found)
     else:
-        if SETTINGS['Enable_GUI']:
-            app = ConverterGUI()
-            app.mainloop()
+        report = run(work_items)
+
+    s = report.summary()
+    emit({'event': 'summary', **s},
+         f"{s['succeeded']}/{s['items']} items OK ({s['skipped']} up to date), {s['pages']} pages, "
+         f"{s['images_per_s']:.1f} images/s, {s['bytes_written'] / 1048576:.1f} MB written, "
+         f"peak {s['peak_rss_mb']:.0f} MB")
+    if parts is not None:
+        emit({'event': 'merged', 'parts': parts}, '\n'.join(f"Merged: {part}" for part in parts) or "Merge failed")
+        if not parts: return 1
+    if SETTINGS['Report_Path'] and progress != 'json': print(f"Run report: {SETTINGS['Report_Path']}")
+    if notify_done and progress != 'json': notify("Image2PDF", "Batch Complete")
+    return 0 if s['succeeded'] == s['items'] and not ABORT_REQUESTED else 1
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    SETTINGS.update({key: getattr(args, key) for key in DEFAULT_SETTINGS if getattr(args, key) is not None})
+    if args.save_settings: save_config(SETTINGS)
+
+    if args.mark_junk:
+        index = JunkIndex(SETTINGS['Junk_Index'] or JUNK_FILE)
+        try:
+            added = mark_junk(args.mark_junk, index)
+        except Exception as e:
+            print(f"Cannot mark junk: {e}", file=sys.stderr)
+            return 1
+        print(f"{added} new junk images, {len(index.hashes)} in {index.path}")
+        if not SETTINGS['Junk_Index']:
+            print(f"Set Junk_Index (--junk-index {index.path}) to flag or skip them.")
+        return 0
+
+    sources = [s.strip('"').strip("'") for s in args.sources]
+    if sources:
+        return run_cli(sources, args.progress, args.dry_run, args.watch, args.merge, args.notify)
+
+    if args.dry_run or not SETTINGS['Enable_GUI']:
+        parser.print_help()
+        return 0
+    try:
+        from gui import ConverterGUI
+        app = ConverterGUI()
+    except Exception as e:
+        print(f"Cannot start the GUI ({e}). Pass folders or archives to convert them headless, see --help.",
+              file=sys.stderr)
+        return 1
+    app.mainloop()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# With a handler in place, main's logging.basicConfig does not create errors.log in the tree
+logging.getLogger().addHandler(logging.NullHandler())
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def settings(tmp_path):
+    """Default settings for every test, with nothing written next to the app."""
+    saved = dict(main.SETTINGS)
+    main.SETTINGS.clear()
+    main.SETTINGS.update(main.DEFAULT_SETTINGS)
+    main.SETTINGS.update({
+        'Image_Extensions': set(main.DEFAULT_SETTINGS['Image_Extensions']),
+        'Incremental': False, 'Parallel_Processing': False, 'Enable_GUI': False,
+        'Corrupt_Report_Path': str(tmp_path / 'corrupt.json'),
+    })
+    yield main.SETTINGS
+    main.SETTINGS.clear()
+    main.SETTINGS.update(saved)
+
+
+def pdf_images(path):
+    """(filter, colour space, pixels) of the image on each page of a PDF, decoded by PyMuPDF."""
+    pymupdf = pytest.importorskip('pymupdf')
+    from PIL import Image
+    images = []
+    with pymupdf.open(path) as doc:
+        for page in doc:
+            xref = page.get_images()[0][0]
+            pix = pymupdf.Pixmap(doc, xref)
+            if pix.colorspace and pix.colorspace.n not in (1, 3): pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+            mode = 'L' if pix.n == 1 else 'RGB'
+            images.append((doc.xref_get_key(xref, 'Filter')[1], doc.xref_get_key(xref, 'ColorSpace')[1],
+                           Image.frombytes(mode, (pix.width, pix.height), pix.samples)))
+    return images
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+from PIL import Image
+
+import main
+
+pytest.importorskip('numpy')
+
+
+def png(img):
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def load(img, settings):
+    settings['Skip_Blank_Pages'] = True
+    pages, _, _, _ = main.load_pages(png(img), main.encoding_options())
+    return pages
+
+
+@pytest.mark.parametrize('img', [
+    Image.new('L', (300, 400), 0),
+    Image.new('I;16', (300, 400), 0),
+    Image.new('RGBA', (300, 400), (180, 20, 40, 255)),
+    Image.new('RGB', (300, 400), (90, 90, 90)),
+], ids=['black', 'black-16bit', 'flat-colour', 'flat-grey'])
+def test_solid_pages_are_kept(img, settings):
+    assert len(load(img, settings)) == 1
+
+
+@pytest.mark.parametrize('paper', [255, 225])
+def test_empty_light_pages_are_skipped(paper, settings):
+    img = Image.new('L', (300, 400), paper)
+    img.putpixel((150, 200), 0)  # a speck of dust
+    assert load(img, settings) == []
+
+
+def test_crop_finds_the_content_box(settings):
+    img = Image.new('L', (400, 600), 255)
+    img.paste(0, (100, 150, 300, 450))
+    verdict = main.analyze_page(img, dict(main.encoding_options(), auto_crop=True))
+    left, top, right, bottom = verdict['box']
+    assert not verdict['blank']
+    assert 90 <= left <= 100 and 140 <= top <= 150 and 300 <= right <= 310 and 450 <= bottom <= 460
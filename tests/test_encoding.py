@@ -0,0 +1,101 @@
+import io
+import random
+
+import pytest
+from PIL import Image, ImageChops, ImageFilter, ImageStat, features
+
+import main
+from conftest import pdf_images
+
+
+def noisy_rgb(width=64, height=48, seed=1):
+    rng = random.Random(seed)
+    return Image.frombytes('RGB', (width, height), bytes(rng.randrange(256) for _ in range(width * height * 3)))
+
+
+def line_art(width=64, height=48):
+    img = Image.new('1', (width, height), 1)
+    for x in range(width):
+        img.putpixel((x, (x * 3) % height), 0)
+        img.putpixel((x, height // 2), 0)
+    return img
+
+
+def palette_image(width=40, height=30):
+    img = Image.new('P', (width, height))
+    img.putpalette([255, 0, 0, 0, 128, 0, 0, 0, 255, 250, 250, 250])
+    img.putdata([(x // 4 + y // 3) % 4 for y in range(height) for x in range(width)])
+    return img
+
+
+def round_trip(tmp_path, page):
+    pdf_path = str(tmp_path / 'out.pdf')
+    assert main.process_images_to_pdf([page], pdf_path, 'test')
+    assert main.validate_pdf(pdf_path, 1)
+    [image] = pdf_images(pdf_path)
+    return image
+
+
+@pytest.mark.skipif(not features.check('libtiff'), reason="CCITT needs Pillow with libtiff")
+def test_bilevel_page_is_ccitt_and_lossless(tmp_path):
+    img = line_art()
+    page = main.encode_image(img)
+    assert page.filter == '/CCITTFaxDecode'
+    filter_, _, pixels = round_trip(tmp_path, page)
+    assert filter_ == '/CCITTFaxDecode'
+    assert pixels.tobytes() == img.convert('L').tobytes()
+
+
+def test_gray_page_is_flate_and_lossless(tmp_path):
+    img = noisy_rgb().convert('L')
+    filter_, colorspace, pixels = round_trip(tmp_path, main.encode_image(img, source_format='PNG'))
+    assert (filter_, colorspace) == ('/FlateDecode', '/DeviceGray')
+    assert pixels.tobytes() == img.tobytes()
+
+
+def test_palette_page_is_indexed_and_lossless(tmp_path):
+    img = palette_image()
+    filter_, colorspace, pixels = round_trip(tmp_path, main.encode_image(img))
+    assert filter_ == '/FlateDecode'
+    assert colorspace.replace(' ', '').startswith('[/Indexed/DeviceRGB3')
+    assert pixels.tobytes() == img.convert('RGB').tobytes()
+
+
+def test_colour_page_is_dct_and_close(tmp_path):
+    img = noisy_rgb().filter(ImageFilter.SMOOTH)
+    filter_, colorspace, pixels = round_trip(tmp_path, main.encode_image(img))
+    assert (filter_, colorspace) == ('/DCTDecode', '/DeviceRGB')
+    assert pixels.size == img.size
+    # Quality 100 with 4:4:4 chroma: only rounding differences
+    assert max(ImageStat.Stat(ImageChops.difference(pixels, img)).mean) < 4
+
+
+def test_reduce_colors_picks_the_native_mode():
+    assert main.reduce_colors(Image.new('RGB', (8, 8), (200, 30, 30))).mode == 'RGB'
+    assert main.reduce_colors(Image.new('RGB', (8, 8), (90, 90, 90))).mode == 'L'
+    assert main.reduce_colors(line_art().convert('RGB')).mode == '1'
+
+
+def jpeg_bytes(img, **kwargs):
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', **kwargs)
+    return buffer.getvalue()
+
+
+def test_passthrough_embeds_the_original_bytes():
+    data = jpeg_bytes(noisy_rgb(48, 64), quality=90)
+    [page], source_format, _, _ = main.load_pages(data, main.encoding_options())
+    assert isinstance(page, main.PdfImage) and page.data == data and source_format == 'JPEG'
+    # Data after the end marker (motion photos, MPF) does not stop passthrough
+    [page], _, _, _ = main.load_pages(data + b'\0' * 100 + b'video', main.encoding_options())
+    assert isinstance(page, main.PdfImage)
+
+
+def test_truncated_jpeg_is_decoded_instead_of_passed_through():
+    data = jpeg_bytes(noisy_rgb(48, 64), quality=90, progressive=True)
+    assert main.jpeg_complete(data)
+    truncated = data[:len(data) // 2]
+    assert not main.jpeg_complete(truncated)
+    with pytest.raises(OSError):
+        main.load_pages(truncated, main.encoding_options())
+    assert main.prepare_pages('cut.jpg', truncated, main.encoding_options()) == []
@@ -0,0 +1,95 @@
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+import main
+
+
+def png(path, shade=0):
+    Image.new('L', (20, 30), shade).save(path)
+    return path
+
+
+def make_archive(path, shade=0):
+    png(str(path) + '.png', shade)
+    with zipfile.ZipFile(path, 'w') as zf: zf.write(str(path) + '.png', '001.png')
+    os.remove(str(path) + '.png')
+
+
+@pytest.fixture
+def archive_item(tmp_path):
+    path = tmp_path / 'vol.cbz'
+    make_archive(path)
+    (tmp_path / 'vol.pdf').write_bytes(b'%PDF-')
+    return {'type': 'archive', 'path': str(path), 'pdf_path': str(tmp_path / 'vol.pdf')}
+
+
+@pytest.fixture
+def folder_item(tmp_path):
+    folder = tmp_path / 'vol'
+    folder.mkdir()
+    for i in range(3): png(str(folder / f'{i}.png'), i * 50)
+    (tmp_path / 'vol.pdf').write_bytes(b'%PDF-')
+    return {'type': 'folder', 'path': str(folder), 'pdf_path': str(tmp_path / 'vol.pdf')}
+
+
+def recorded(tmp_path, item):
+    manifest = main.ConversionManifest(str(tmp_path / 'manifest.json'))
+    manifest.record(item)
+    manifest.save()
+    return main.ConversionManifest(str(tmp_path / 'manifest.json'))
+
+
+def touch(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+
+def test_unchanged_item_is_skipped(tmp_path, archive_item, folder_item):
+    for item in (archive_item, folder_item):
+        assert recorded(tmp_path, item).is_up_to_date(item)
+
+
+def test_touched_archive_with_same_members_is_skipped(tmp_path, archive_item):
+    manifest = recorded(tmp_path, archive_item)
+    touch(archive_item['path'])
+    assert manifest.is_up_to_date(archive_item)
+    # The new modification time is remembered
+    assert manifest.entries[manifest.key(archive_item)]['mtime'] == os.stat(archive_item['path']).st_mtime_ns
+
+
+def test_changed_archive_is_converted_again(tmp_path, archive_item):
+    manifest = recorded(tmp_path, archive_item)
+    make_archive(archive_item['path'], shade=255)
+    assert not manifest.is_up_to_date(archive_item)
+
+
+def test_changed_folder_is_converted_again(tmp_path, folder_item):
+    manifest = recorded(tmp_path, folder_item)
+    touch(os.path.join(folder_item['path'], '1.png'))
+    assert not manifest.is_up_to_date(folder_item)
+
+    manifest = recorded(tmp_path, folder_item)
+    png(os.path.join(folder_item['path'], '3.png'))
+    assert not manifest.is_up_to_date(folder_item)
+
+
+def test_new_settings_or_missing_pdf_invalidate(tmp_path, settings, archive_item):
+    recorded(tmp_path, archive_item)
+    settings['PDF_Quality'] = 80
+    assert not main.ConversionManifest(str(tmp_path / 'manifest.json')).is_up_to_date(archive_item)
+
+    settings['PDF_Quality'] = 100
+    manifest = main.ConversionManifest(str(tmp_path / 'manifest.json'))
+    assert manifest.is_up_to_date(archive_item)
+    os.remove(archive_item['pdf_path'])
+    assert not manifest.is_up_to_date(archive_item)
+
+
+def test_fingerprint_reads_no_image_data(archive_item, monkeypatch):
+    opened = []
+    monkeypatch.setattr(zipfile.ZipFile, 'open', lambda *args, **kwargs: opened.append(args))
+    main.source_hash(archive_item)
+    assert not opened
@@ -0,0 +1,54 @@
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+import main
+
+
+@pytest.fixture
+def chapters(tmp_path):
+    """Chapter 1 and Chapter 10 as folders, Chapter 2 as an archive; two pages each."""
+    items = []
+    for name in ('Chapter 10', 'Chapter 1'):
+        folder = tmp_path / name
+        folder.mkdir()
+        for i in range(2): Image.new('L', (40, 60), 30 * i).save(folder / f'{i}.png')
+        items.append({'type': 'folder', 'path': str(folder), 'pdf_path': str(folder) + '.pdf'})
+    archive = tmp_path / 'Chapter 2.cbz'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for i in range(2):
+            Image.new('L', (40, 60), 100 + i).save(tmp_path / 'page.png')
+            zf.write(tmp_path / 'page.png', f'{i}.png')
+    items.append({'type': 'archive', 'path': str(archive), 'pdf_path': str(tmp_path / 'Chapter 2.pdf')})
+    return items
+
+
+def toc(path):
+    pymupdf = pytest.importorskip('pymupdf')
+    with pymupdf.open(path) as doc:
+        return len(doc), [(title, page) for _, title, page in doc.get_toc()]
+
+
+def test_merge_orders_naturally_with_a_bookmark_per_item(tmp_path, chapters):
+    pdf_path = str(tmp_path / 'omnibus.pdf')
+    report, parts = main.merge_items(chapters, pdf_path)
+    assert parts == [pdf_path]
+    assert report.summary()['succeeded'] == 3
+    assert main.validate_pdf(pdf_path, 6)
+    assert toc(pdf_path) == (6, [('Chapter 1', 1), ('Chapter 2', 3), ('Chapter 10', 5)])
+
+
+def test_merge_splits_into_parts(tmp_path, settings, chapters):
+    settings['Merge_Max_Pages'] = 3
+    pdf_path = str(tmp_path / 'omnibus.pdf')
+    _, parts = main.merge_items(chapters, pdf_path)
+    assert parts == [main.merge_part_path(pdf_path, 1), main.merge_part_path(pdf_path, 2)]
+    assert not os.path.exists(pdf_path)
+    assert toc(parts[0]) == (3, [('Chapter 1', 1), ('Chapter 2', 3)])
+    # The chapter that runs over is bookmarked again where the next part starts
+    count, bookmarks = toc(parts[1])
+    assert count == 3
+    assert [page for _, page in bookmarks] == [1, 2]
+    assert bookmarks[0][0].startswith('Chapter 2') and bookmarks[1][0] == 'Chapter 10'
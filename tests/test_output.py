@@ -0,0 +1,56 @@
+import contextlib
+import io
+import os
+
+from PIL import Image
+
+import main
+
+
+def write_pdf(path, pages=3):
+    images = [Image.new('L', (60, 80), 40 * i) for i in range(pages)]
+    assert main.process_images_to_pdf(images, str(path), 'test')
+    return str(path)
+
+
+def test_validate_pdf_accepts_complete_output(tmp_path):
+    pdf_path = write_pdf(tmp_path / 'good.pdf')
+    assert main.validate_pdf(pdf_path)
+    assert main.validate_pdf(pdf_path, 3)
+    assert not main.validate_pdf(pdf_path, 2)
+
+
+def test_validate_pdf_rejects_truncated_output(tmp_path):
+    with open(write_pdf(tmp_path / 'good.pdf'), 'rb') as f: data = f.read()
+    for size in (len(data) - 10, len(data) // 2, 8, 0):
+        cut = tmp_path / f'cut-{size}.pdf'
+        cut.write_bytes(data[:size])
+        assert not main.validate_pdf(str(cut), 3)
+    assert not main.validate_pdf(str(tmp_path / 'missing.pdf'))
+
+
+def test_failed_write_keeps_the_earlier_pdf(tmp_path):
+    pdf_path = write_pdf(tmp_path / 'book.pdf')
+    with open(pdf_path, 'rb') as f: before = f.read()
+    assert not main.process_images_to_pdf([], pdf_path, 'test')
+    with open(pdf_path, 'rb') as f: assert f.read() == before
+    assert os.listdir(tmp_path) == ['book.pdf']
+
+
+class ShortWrites(io.BytesIO):
+    """A raw file that accepts at most 1000 bytes per write, like some network shares."""
+
+    def write(self, data):
+        return super().write(bytes(data[:1000]))
+
+
+def test_chunked_output_survives_short_writes():
+    f = ShortWrites()
+    out = main.ChunkedOutput(f, contextlib.nullcontext())
+    big = os.urandom(main.WRITE_BUFFER + 12345)
+    out.write(b'%PDF-1.4\n')
+    out.write(big)
+    out.write(b'trailer')
+    out.flush()
+    assert f.getvalue() == b'%PDF-1.4\n' + big + b'trailer'
+    assert out.tell() == len(f.getvalue())
@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import random
+import struct
+import zipfile
+import zlib
+
+import pytest
+from PIL import Image
+
+import main
+
+
+def jpeg(seed=1, size=(64, 80), **kwargs):
+    rng = random.Random(seed)
+    img = Image.frombytes('RGB', size, bytes(rng.randrange(256) for _ in range(size[0] * size[1] * 3)))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', **kwargs)
+    return buffer.getvalue()
+
+
+def cbz(path, members, compression=zipfile.ZIP_STORED):
+    with zipfile.ZipFile(path, 'w', compression) as zf:
+        for name, data in members.items(): zf.writestr(name, data)
+    return {'type': 'archive', 'path': str(path), 'pdf_path': os.path.splitext(str(path))[0] + '.pdf'}
+
+
+def rar_block(head_type, flags, body):
+    header = struct.pack('<BHH', head_type, flags, 7 + len(body)) + body
+    return struct.pack('<H', zlib.crc32(header) & 0xFFFF) + header
+
+
+def cbr(path, members):
+    """Writes a RAR4 archive with stored members, which rarfile reads without unrar."""
+    out = b'Rar!\x1a\x07\x00' + rar_block(0x73, 0, bytes(6))
+    for name, data in members.items():
+        body = struct.pack('<IIBIIBBHI', len(data), len(data), 3, zlib.crc32(data), 0x5A000000, 20, 0x30,
+                           len(name), 0o100644) + name.encode()
+        out += rar_block(0x74, 0x8000, body) + data
+    out += rar_block(0x7B, 0x4000, b'')
+    with open(path, 'wb') as f: f.write(out)
+    return {'type': 'archive', 'path': str(path), 'pdf_path': os.path.splitext(str(path))[0] + '.pdf'}
+
+
+def errors(problems):
+    return [p for p in problems if not p.get('warning')]
+
+
+@pytest.mark.parametrize('full', [False, True])
+def test_truncated_cbz_is_corrupt(tmp_path, full):
+    item = cbz(tmp_path / 'vol.cbz', {'001.jpg': jpeg(1), '002.jpg': jpeg(2)})
+    assert main.check_item(item, full) == []
+    with open(item['path'], 'rb') as f: data = f.read()
+    with open(item['path'], 'wb') as f: f.write(data[:len(data) // 2])
+    assert errors(main.check_item(item, full))
+
+
+@pytest.mark.parametrize('full', [False, True])
+def test_truncated_member_is_corrupt(tmp_path, full):
+    data = jpeg(progressive=True)
+    item = cbz(tmp_path / 'vol.cbz', {'001.jpg': data[:len(data) - 600]})
+    [problem] = main.check_item(item, full)
+    assert problem['member'] == '001.jpg' and 'truncated JPEG' in problem['problem'] and not problem.get('warning')
+
+
+@pytest.mark.parametrize('full', [False, True])
+def test_data_after_the_end_marker_is_only_a_warning(tmp_path, full):
+    item = cbz(tmp_path / 'vol.cbz', {'001.jpg': jpeg() + b'ftypmp42' * 1000})
+    [problem] = main.check_item(item, full)
+    assert problem['warning']
+    assert list(main.Preflight().filter([item])) == [item]
+
+
+@pytest.mark.parametrize('full', [False, True])
+def test_rar_members_are_checked(tmp_path, full):
+    pytest.importorskip('rarfile')
+    data = jpeg(progressive=True)
+    assert main.check_item(cbr(tmp_path / 'good.cbr', {'001.jpg': data, '002.jpg': data}), full) == []
+    [problem] = main.check_item(cbr(tmp_path / 'cut.cbr', {'001.jpg': data[:len(data) - 600]}), full)
+    assert problem['member'] == '001.jpg' and 'truncated JPEG' in problem['problem'] and not problem.get('warning')
+    [problem] = main.check_item(cbr(tmp_path / 'motion.cbr', {'001.jpg': data + b'ftypmp42' * 1000}), full)
+    assert problem['member'] == '001.jpg' and problem['warning']
+
+
+def test_jpeg_end_follows_segments():
+    data = jpeg()
+    assert main.jpeg_end(data) == len(data)
+    # An EXIF thumbnail's end marker inside an APP1 segment is skipped over
+    thumbnail = jpeg(2, (8, 8))
+    app1 = b'\xff\xe1' + (len(thumbnail) + 2).to_bytes(2, 'big') + thumbnail
+    with_thumbnail = data[:2] + app1 + data[2:]
+    assert main.jpeg_end(with_thumbnail) == len(with_thumbnail)
+    assert main.jpeg_end(with_thumbnail[:len(app1) + 400]) is None
+
+
+def test_broken_items_are_reported_and_quarantined(tmp_path, settings):
+    settings['Quarantine_Path'] = str(tmp_path / 'quarantine')
+    good = cbz(tmp_path / 'good.cbz', {'001.jpg': jpeg()})
+    broken = cbz(tmp_path / 'broken.cbz', {'001.jpg': jpeg()[:500]})
+    found = []
+    preflight = main.Preflight()
+    assert list(preflight.filter([good, broken], found.append)) == [good]
+    preflight.save()
+    assert found == [broken]
+    assert os.listdir(settings['Quarantine_Path']) == ['broken.cbz'] and not os.path.exists(broken['path'])
+    with open(settings['Corrupt_Report_Path'], encoding='utf-8') as f: report = json.load(f)['items']
+    assert list(report) == [broken['path']]
+    assert report[broken['path']]['quarantined'] == os.path.join(settings['Quarantine_Path'], 'broken.cbz')
+
+
+def test_folders_holding_other_items_stay_in_place(tmp_path, settings):
+    settings['Quarantine_Path'] = str(tmp_path / 'quarantine')
+    series = tmp_path / 'series'
+    (series / 'vol1').mkdir(parents=True)
+    (series / 'cover.jpg').write_bytes(jpeg()[:500])
+    (series / 'vol1' / '001.jpg').write_bytes(jpeg())
+    item = {'type': 'folder', 'path': str(series), 'pdf_path': str(series) + '.pdf'}
+    assert list(main.Preflight().filter([item])) == []
+    assert os.path.isdir(series / 'vol1') and not os.path.exists(settings['Quarantine_Path'])
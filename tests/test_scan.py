@@ -0,0 +1,58 @@
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+import main
+
+
+@pytest.fixture
+def library(tmp_path):
+    """lib/a.cbz, lib/loose/{1.png, extra/2.png}, lib/series/{vol1/1.png, vol2.cbz}"""
+    lib = tmp_path / 'lib'
+    for folder in ('loose/extra', 'series/vol1'): (lib / folder).mkdir(parents=True)
+    for path in ('loose/1.png', 'loose/extra/2.png', 'series/vol1/1.png'):
+        Image.new('L', (10, 10)).save(lib / path)
+    for path in ('a.cbz', 'series/vol2.cbz'):
+        with zipfile.ZipFile(lib / path, 'w') as zf: zf.writestr('1.png', b'')
+    return lib
+
+
+def scan(lib, depth):
+    return [(item['type'], os.path.relpath(item['path'], lib)) for item in main.scan_sources(str(lib), depth)]
+
+
+def test_depth_one_converts_direct_children(library):
+    assert scan(library, 1) == [('archive', 'a.cbz'), ('folder', 'loose'), ('folder', 'series')]
+
+
+def test_deeper_scans_find_nested_volumes(library):
+    nested = [('archive', 'a.cbz'), ('folder', 'loose'), ('folder', os.path.join('loose', 'extra')),
+              ('folder', os.path.join('series', 'vol1')), ('archive', os.path.join('series', 'vol2.cbz'))]
+    assert scan(library, 2) == nested
+    assert scan(library, 0) == nested
+
+
+def test_single_archive_source(library):
+    assert [item['path'] for item in main.scan_sources(str(library / 'a.cbz'))] == [str(library / 'a.cbz')]
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="needs symlinks")
+def test_symlink_loops_and_aliases_are_visited_once(library):
+    try:
+        os.symlink(library, library / 'series' / 'vol1' / 'back')
+        os.symlink(library / 'series', library / 'alias')
+    except OSError:
+        pytest.skip("symlinks not permitted here")
+    items = list(main.scan_sources(str(library), 0))
+    # alias sorts before series, so the series volumes are found through it
+    assert len({os.path.realpath(item['path']) for item in items}) == len(items) == 5
+    assert not any('back' in item['path'] for item in items)
+
+
+def test_output_path_mirrors_the_tree(library, settings, tmp_path):
+    settings['Output_Path'] = str(tmp_path / 'out')
+    os.makedirs(settings['Output_Path'])
+    pdf_paths = {os.path.relpath(item['pdf_path'], settings['Output_Path']) for item in main.scan_sources(str(library), 2)}
+    assert os.path.join('series', 'vol1.pdf') in pdf_paths and os.path.join('loose', 'extra.pdf') in pdf_paths
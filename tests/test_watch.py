@@ -0,0 +1,47 @@
+from PIL import Image
+
+import main
+
+
+class FakeObserver:
+    def stop(self): pass
+    def join(self): pass
+
+
+def event(watcher, *paths):
+    with watcher.lock: watcher.changed.update(str(p) for p in paths)
+
+
+def test_settled_item_is_handed_out_once(tmp_path, settings, monkeypatch):
+    settings.update(Watch_Settle=0, Incremental=False)
+    # Events are fed in by hand, as the watchdog handler would
+    monkeypatch.setattr(main.SourceWatcher, 'start_observer', lambda self: FakeObserver())
+    watcher = main.SourceWatcher([str(tmp_path)])
+    assert watcher.poll() == []
+
+    volume = tmp_path / 'vol1'
+    volume.mkdir()
+    Image.new('L', (10, 10)).save(volume / '1.png')
+    event(watcher, volume)
+    assert watcher.poll() == []  # first seen, not settled yet
+    Image.new('L', (10, 10)).save(volume / '2.png')
+    event(watcher, volume / '2.png')
+    assert watcher.poll() == []  # still changing
+    [item] = watcher.poll()
+    assert item['path'] == str(volume)
+
+    # Writing the PDF next to it modifies the parent folder, which forces a rescan
+    (tmp_path / 'vol1.pdf').write_bytes(b'%PDF-')
+    event(watcher, tmp_path)
+    assert watcher.poll() == [] and watcher.poll() == []
+
+    Image.new('L', (10, 10)).save(volume / '3.png')
+    event(watcher, volume / '3.png')
+    watcher.poll()
+    assert [item['path'] for item in watcher.poll()] == [str(volume)]
+
+
+def test_output_folder_paths_are_recognised(tmp_path):
+    assert main.is_within(str(tmp_path / 'out' / 'a' / 'b.png'), str(tmp_path / 'out'))
+    assert main.is_within(str(tmp_path / 'out'), str(tmp_path / 'out'))
+    assert not main.is_within(str(tmp_path / 'outside.png'), str(tmp_path / 'out'))